@@ -0,0 +1,139 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from changes import FeedCache
+
+# Columns a report can be grouped by.
+DIMENSIONS = ["Class Code", "Day", "Time Block", "Intelligence"]
+
+SOURCE_TABLES = ("students", "assignments", "submissions", "scores")
+
+TASK_KEYS = ["Student", "Task Name", "Day"]
+
+
+def intelligence_of(time_blocks):
+    """
+    Maps a Series of time block names to the intelligence they train: "LM Soma Time" is
+    Logical-Mathematical (LM), "KIN Siri Time" Kinesthetic (KIN), and shared blocks are Other.
+    """
+    blocks = time_blocks.fillna("").astype(str).str.upper()
+    return pd.Series(
+        np.select([blocks.str.startswith("LM"), blocks.str.startswith("KIN")], ["LM", "KIN"], "Other"),
+        index=time_blocks.index,
+    )
+
+
+def build_facts(students, assignments, submissions, scores):
+    """
+    Joins the four tables into one row per (class, student, task, day): whether it was assigned
+    and submitted, minutes from start to first submission, and the XP and Umeme it earned.
+    """
+    assigned = assignments[TASK_KEYS + ["Time Block"]].drop_duplicates(TASK_KEYS)
+
+    points = scores.groupby("Submission ID")[["XP", "Umeme"]].sum().reset_index()
+    submitted = submissions.merge(points, on="Submission ID", how="left")
+    submitted["Minutes"] = (submitted["Submission Time"] - submitted["Start Time"]).dt.total_seconds() / 60
+    submitted = submitted.sort_values("Submission Time", kind="stable")
+    per_task = submitted.groupby(TASK_KEYS, sort=False).agg(
+        **{
+            "Submitted Block": ("Time Block", "first"),
+            "Minutes": ("Minutes", "first"),
+            "XP": ("XP", "sum"),
+            "Umeme": ("Umeme", "sum"),
+        }
+    ).reset_index()
+
+    facts = assigned.merge(per_task, on=TASK_KEYS, how="outer", indicator=True)
+    facts["Assigned"] = facts["_merge"] != "right_only"
+    facts["Completed"] = facts["_merge"] != "left_only"
+    facts["Time Block"] = facts["Time Block"].fillna(facts["Submitted Block"])
+    facts["Intelligence"] = intelligence_of(facts["Time Block"])
+    facts[["XP", "Umeme"]] = facts[["XP", "Umeme"]].astype("Float64").fillna(0)
+
+    roster = students[["Student Name", "Class Code"]].drop_duplicates()
+    facts = facts.merge(roster, left_on="Student", right_on="Student Name", how="left")
+    facts["Class Code"] = facts["Class Code"].fillna("No class")
+    return facts[["Class Code", "Student", "Task Name", "Day", "Time Block", "Intelligence",
+                  "Assigned", "Completed", "Minutes", "XP", "Umeme"]]
+
+
+def summarize(facts, by):
+    """Completion rate, median time-to-submit and XP/Umeme totals and averages per group of `by` columns."""
+    if facts.empty:
+        return pd.DataFrame(columns=by + ["Assigned", "Completed", "Completion Rate", "Median Minutes",
+                                          "Total XP", "Mean XP", "Total Umeme", "Mean Umeme"])
+    completed_assigned = facts["Assigned"] & facts["Completed"]
+    summary = facts.assign(**{"Completed Assigned": completed_assigned}).groupby(by, dropna=False).agg(
+        **{
+            "Assigned": ("Assigned", "sum"),
+            "Completed": ("Completed", "sum"),
+            "Completed Assigned": ("Completed Assigned", "sum"),
+            "Median Minutes": ("Minutes", "median"),
+            "Total XP": ("XP", "sum"),
+            "Total Umeme": ("Umeme", "sum"),
+        }
+    )
+    completed = summary["Completed"].replace(0, np.nan)
+    summary["Completion Rate"] = (summary["Completed Assigned"] / summary["Assigned"].replace(0, np.nan)).round(3)
+    summary["Mean XP"] = (summary["Total XP"] / completed).round(1)
+    summary["Mean Umeme"] = (summary["Total Umeme"] / completed).round(1)
+    summary["Median Minutes"] = summary["Median Minutes"].round(1)
+    return summary[["Assigned", "Completed", "Completion Rate", "Median Minutes",
+                    "Total XP", "Mean XP", "Total Umeme", "Mean Umeme"]].reset_index()
+
+
+def distribution(facts, metric, by, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+    """Quantiles of XP or Umeme per completed task, for each group of `by` columns."""
+    completed = facts[facts["Completed"]]
+    if completed.empty:
+        return pd.DataFrame(columns=by + [f"p{round(q * 100)}" for q in quantiles])
+    table = completed.groupby(by, dropna=False)[metric].quantile(list(quantiles)).unstack()
+    table.columns = [f"p{round(q * 100)}" for q in table.columns]
+    return table.reset_index()
+
+
+class ClassAnalytics(FeedCache):
+    """
+    The analytics fact table, rebuilt only when one of its source tables changes,
+    with each grouping's summary kept until then so repeat views cost nothing.
+    """
+
+    def __init__(self, repo, feed=None):
+        super().__init__(feed, SOURCE_TABLES)
+        self.repo = repo
+        self.versions = None
+        self.facts = None
+        self.reports = {}
+        self.lock = threading.Lock()
+
+    def _reload(self):
+        versions = {table: self.repo.version(table) for table in SOURCE_TABLES}
+        if versions == self.versions:
+            return
+        self.facts = build_facts(
+            self.repo.find("students", columns=["Student Name", "Class Code"]),
+            self.repo.find("assignments", columns=TASK_KEYS + ["Time Block"]),
+            self.repo.find("submissions", columns=TASK_KEYS + ["Time Block", "Submission Time", "Start Time", "Submission ID"]),
+            self.repo.find("scores", columns=["Submission ID", "XP", "Umeme"]),
+        )
+        self.reports = {}
+        self.versions = versions
+
+    def _report(self, name, by, class_code, build):
+        with self.lock:
+            self._refresh()
+            key = (name, tuple(by), class_code)
+            if key not in self.reports:
+                facts = self.facts if class_code is None else self.facts[self.facts["Class Code"] == class_code]
+                self.reports[key] = build(facts)
+            return self.reports[key]
+
+    def summary(self, by, class_code=None):
+        """summarize() over all classes, or one class."""
+        return self._report("summary", by, class_code, lambda facts: summarize(facts, list(by)))
+
+    def distribution(self, metric, by, class_code=None):
+        """distribution() of XP or Umeme over all classes, or one class."""
+        return self._report(metric, by, class_code, lambda facts: distribution(facts, metric, list(by)))
@@ -0,0 +1,45 @@
+import pandas as pd
+
+# How tasks are shared out when assigning a day or the whole unit to a class.
+DISTRIBUTIONS = {
+    "all": "Every student gets every task",
+    "round_robin": "Round-robin: one task per student per day",
+    "time_block": "One task per student per time block",
+}
+
+
+def plan_assignments(students, tasks, existing, cse, distribution="all"):
+    """
+    Builds assignment rows for a whole class in one pass.
+
+    students: list of student names; tasks: DataFrame with Day, Element and Task Name;
+    existing: the assignments table, used to skip (Student, Task Name, Day) rows already assigned.
+    With "round_robin" the tasks of each day are dealt out in turn, and with "time_block" the
+    tasks of each (Day, Element) slot are, so neighbouring students work on different tasks.
+    Returns a DataFrame with the assignments table's columns.
+    """
+    columns = ["Student", "Task Name", "Day", "Time Block", "CSE"]
+    if not students or tasks.empty:
+        return pd.DataFrame(columns=columns)
+
+    tasks = tasks[["Day", "Element", "Task Name"]].drop_duplicates(["Day", "Task Name"])
+    roster = pd.DataFrame({"Student": list(dict.fromkeys(students))})
+    roster["Position"] = range(len(roster))
+    plan = roster.merge(tasks, how="cross")
+
+    if distribution != "all":
+        group = ["Day"] if distribution == "round_robin" else ["Day", "Element"]
+        plan["Rank"] = plan.groupby(["Student"] + group).cumcount()
+        plan["Group Size"] = plan.groupby(["Student"] + group)["Task Name"].transform("size")
+        plan = plan[plan["Position"] % plan["Group Size"] == plan["Rank"]]
+
+    plan = plan.rename(columns={"Element": "Time Block"})
+    plan["CSE"] = cse
+
+    if not existing.empty:
+        keys = ["Student", "Task Name", "Day"]
+        already = existing[keys].drop_duplicates()
+        plan = plan.merge(already, on=keys, how="left", indicator=True)
+        plan = plan[plan["_merge"] == "left_only"]
+
+    return plan[columns].reset_index(drop=True)
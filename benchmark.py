@@ -0,0 +1,310 @@
+"""
+Synthetic load generator and benchmark for the classroom workflow.
+
+Generates a configurable amount of history, then drives the real app headlessly through
+streamlit.testing.v1.AppTest (Create Class, Join Class, Start Session, Assign Task,
+Submit Task, Save Rating) and times each rerun. It also measures concurrent write throughput
+with several worker processes and the peak memory of each storage operation.
+
+    python benchmark.py --classes 10 --students 40 --history 20000 --backend sqlite
+    python benchmark.py --json results.json --baseline previous.json
+"""
+import argparse
+import ast
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from multiprocessing import Pool
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "streamlit_app.py")
+SCHEDULE_PATH = os.path.join(APP_DIR, "unit_schedule.csv")
+sys.path.insert(0, APP_DIR)
+
+import assignments  # noqa: E402
+import bootstrap  # noqa: E402
+import repository  # noqa: E402
+
+FLOWS = ["Create Class", "Join Class", "Start Session", "Assign Task", "Submit Task", "Save Rating"]
+RUBRIC = [5, 10, 15, 25, 30]
+
+# --------------------------
+# SEED DATA
+# --------------------------
+def _literal_assignment(path, name):
+    """Reads the list literal assigned to `name` in a Python source file, without running it."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"No '{name}' list in {path}")
+
+
+def load_seed_tasks():
+    """
+    Returns the task list: the app's seed tasks plus the activities in unit_schedule.csv
+    (which is a script holding a schedule_data list, not a plain CSV).
+    """
+    tasks = [dict(zip(repository.TABLES["tasks"], row)) for row in bootstrap.TASKS_DATA]
+    known = {(task["Day"], task["Task Name"]) for task in tasks}
+    for day, block, task_name, resources in _literal_assignment(SCHEDULE_PATH, "schedule_data"):
+        if (day, task_name) not in known:
+            tasks.append({"Day": day, "Element": block, "Task Name": task_name, "Description": "", "Resources": resources})
+    return tasks
+
+
+def generate_data(repo, classes, students_per_class, history, seed=0):
+    """Fills repo with classes, enrolled students, a full unit of assignments and `history` submissions."""
+    rng = random.Random(seed)
+    tasks = load_seed_tasks()
+    if repo.is_empty("tasks"):
+        repo.insert_many("tasks", tasks)
+    tasks_df = repo.find("tasks")
+
+    roster = []
+    for c in range(classes):
+        code = f"bench{c:04d}"
+        repo.insert_many("classes", [{"Class Code": code, "Class Name": f"Bench Class {c}", "CSE": f"CSE {c}"}])
+        students = [f"student-{c}-{s}" for s in range(students_per_class)]
+        repo.insert_many("students", [{"Student Name": name, "Class Code": code} for name in students])
+        repo.insert_many("sessions", [{"Class Code": code, "Session Status": "Active"}])
+        plan = assignments.plan_assignments(students, tasks_df, repository.empty_frame("assignments"), f"CSE {c}", "time_block")
+        repo.insert_many("assignments", plan.to_dict("records"))
+        roster.extend(students)
+
+    batch_submissions, batch_scores = [], []
+    for i in range(history):
+        student = rng.choice(roster)
+        task = tasks[rng.randrange(len(tasks))]
+        submission_id = f"hist-{i}"
+        batch_submissions.append({
+            "Student": student, "Task Name": task["Task Name"], "File Type": "text", "File Name": "N/A",
+            "Submission Time": f"2025-0{rng.randint(1, 9)}-1{rng.randint(0, 9)} 10:{rng.randint(10, 59)}:00",
+            "Start Time": f"2025-01-01 09:{rng.randint(10, 59)}:00", "Day": task["Day"], "Time Block": task["Element"], "Feedback": "",
+            "File Ref": "", "Submission ID": submission_id,
+        })
+        batch_scores.append({"Student": student, "XP": 0, "Rating": "Pending", "Umeme": rng.choice([5, 10, 15]),
+                             "Score ID": f"{submission_id}-umeme", "Submission ID": submission_id})
+        if rng.random() < 0.7:
+            batch_scores.append({"Student": student, "XP": rng.choice(RUBRIC), "Rating": "Rated", "Umeme": 0,
+                                 "Score ID": f"{submission_id}-rating", "Submission ID": submission_id})
+        if len(batch_submissions) >= 5000:
+            repo.insert_many("submissions", batch_submissions)
+            repo.insert_many("scores", batch_scores)
+            batch_submissions, batch_scores = [], []
+    repo.insert_many("submissions", batch_submissions)
+    repo.insert_many("scores", batch_scores)
+
+# --------------------------
+# APP FLOWS
+# --------------------------
+def _open(page):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=120).run()
+    at.sidebar.radio[0].set_value(page).run()
+    return at
+
+
+def _widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def _timed(action, latencies, flow):
+    """Runs one AppTest rerun, recording its wall time under flow."""
+    start = time.perf_counter()
+    at = action.run()
+    latencies.setdefault(flow, []).append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(f"{flow} raised: {at.exception[0].message}")
+    return at
+
+
+def run_flows(iterations, latencies):
+    """Walks one new class and student through every flow, `iterations` times."""
+    for k in range(iterations):
+        class_name = f"Flow Class {k}-{time.time_ns()}"
+        student = f"flow-student-{k}"
+
+        at = _open("🏫 Class Management")
+        _widget(at.text_input, "Enter Your Name (CSE)").input("Bench CSE")
+        _widget(at.text_input, "Enter Class Name").input(class_name)
+        at = _timed(_widget(at.button, "Create Class").click(), latencies, "Create Class")
+        code = at.success[0].value.split("Class Code: ")[1]
+
+        at = _open("🎓 Student Dashboard")
+        _widget(at.text_input, "Enter Your Name").input(student)
+        _widget(at.text_input, "Enter Class Code").input(code)
+        _timed(_widget(at.button, "Join Class").click(), latencies, "Join Class")
+
+        at = _open("📊 CSE Dashboard")
+        _widget(at.selectbox, "Select Your Class").set_value(code).run()
+        _timed(_widget(at.button, "Start Session").click(), latencies, "Start Session")
+
+        at = _open("📊 CSE Dashboard")
+        _widget(at.selectbox, "Select Your Class").set_value(code).run()
+        _timed(_widget(at.button, "Assign Task").click(), latencies, "Assign Task")
+
+        at = _open("🎓 Student Dashboard")
+        _widget(at.text_input, "Enter Your Name").input(student)
+        _widget(at.text_input, "Enter Class Code").input(code).run()
+        at.text_area[0].input(f"My answer {k} because the reason is logical and clear enough to pass.")
+        _timed(_widget(at.button, "Submit Task").click(), latencies, "Submit Task")
+
+        at = _open("📊 CSE Dashboard")
+        _widget(at.selectbox, "Select Your Class").set_value(code).run()
+        _timed(_widget(at.button, "Save Rating").click(), latencies, "Save Rating")
+
+# --------------------------
+# STORAGE MEASUREMENTS
+# --------------------------
+def _write_worker(args):
+    worker, writes = args
+    repo = repository.open_repository()
+    start = time.perf_counter()
+    for i in range(writes):
+        submission_id = f"load-{worker}-{i}-{time.time_ns()}"
+        repo.insert_new("submissions", [{"Student": f"load-{worker}", "Task Name": "Spot the Logic", "Submission ID": submission_id}])
+        repo.insert_new("scores", [{"Student": f"load-{worker}", "XP": 0, "Rating": "Pending", "Umeme": 15,
+                                    "Score ID": f"{submission_id}-umeme", "Submission ID": submission_id}])
+    return time.perf_counter() - start
+
+
+def measure_write_throughput(workers, writes_per_worker):
+    """Submissions per second with `workers` processes submitting at once."""
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        pool.map(_write_worker, [(w, writes_per_worker) for w in range(workers)])
+    elapsed = time.perf_counter() - start
+    return workers * writes_per_worker / elapsed
+
+
+def measure_storage_ops(repo):
+    """Latency and peak traced memory of each storage read and write."""
+    results = {}
+
+    def measure(name, func):
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        func()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {"ms": round(elapsed_ms, 2), "peak_kb": round(peak / 1024, 1)}
+
+    for table in repository.TABLES:
+        measure(f"read:{table}", lambda table=table: repo.find(table))
+    measure("read:assignments by student", lambda: repo.find("assignments", {"Student": "student-0-0"}))
+    measure("write:submissions", lambda: repo.insert_new("submissions", [{"Student": "mem", "Submission ID": f"mem-{time.time_ns()}"}]))
+    measure("write:scores", lambda: repo.insert_many("scores", [{"Student": "mem", "XP": 5, "Rating": "Rated", "Umeme": 0}]))
+    return results
+
+# --------------------------
+# REPORT
+# --------------------------
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def summarize(latencies):
+    return {
+        flow: {
+            "runs": len(samples),
+            "p50_ms": round(statistics.median(samples), 1),
+            "p95_ms": round(percentile(samples, 0.95), 1),
+        }
+        for flow, samples in latencies.items()
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns lines describing flows whose p95 grew by more than tolerance over the baseline."""
+    regressions = []
+    for flow, stats in results["flows"].items():
+        before = baseline.get("flows", {}).get(flow)
+        if before and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{flow}: p95 {before['p95_ms']} ms -> {stats['p95_ms']} ms")
+    before_throughput = baseline.get("writes_per_second")
+    if before_throughput and results["writes_per_second"] < before_throughput * (1 - tolerance):
+        regressions.append(f"write throughput: {before_throughput} -> {results['writes_per_second']} per second")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="parquet", choices=["parquet", "csv", "sqlite", "mongodb"])
+    parser.add_argument("--classes", type=int, default=5)
+    parser.add_argument("--students", type=int, default=20, help="students per class")
+    parser.add_argument("--history", type=int, default=1000, help="past submissions to generate")
+    parser.add_argument("--iterations", type=int, default=5, help="passes through every flow")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent writer processes")
+    parser.add_argument("--writes", type=int, default=50, help="submissions per writer process")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+    # Resolve output and baseline paths against where the benchmark was started, not the temp folder
+    for name in ("json", "baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    workdir = tempfile.mkdtemp(prefix="uwazi-bench-")
+    os.chdir(workdir)
+    os.environ["UWAZI_STORAGE"] = args.backend
+    os.environ.setdefault("UWAZI_DATA_DIR", workdir)
+    os.environ.setdefault("UWAZI_SQLITE_PATH", os.path.join(workdir, "uwazi.db"))
+    os.environ.setdefault("UWAZI_MONGO_DB", f"uwazi_bench_{os.getpid()}")
+    os.environ.setdefault("UWAZI_BLOB_DIR", os.path.join(workdir, "uploads"))
+
+    repo = repository.open_repository()
+    start = time.perf_counter()
+    generate_data(repo, args.classes, args.students, args.history, args.seed)
+    print(f"Generated {args.classes} classes x {args.students} students and {args.history} submissions "
+          f"in {time.perf_counter() - start:.1f}s ({args.backend}, {workdir})")
+
+    # Worker processes pickle _write_worker by reference to __main__, so they run before
+    # AppTest swaps in the app script as __main__.
+    writes_per_second = round(measure_write_throughput(args.workers, args.writes), 1)
+    storage = measure_storage_ops(repo)
+    latencies = {}
+    run_flows(args.iterations, latencies)
+    results = {
+        "config": vars(args),
+        "flows": summarize(latencies),
+        "writes_per_second": writes_per_second,
+        "storage": storage,
+    }
+
+    print(f"\n{'Flow':<16}{'runs':>6}{'p50 ms':>10}{'p95 ms':>10}")
+    for flow in FLOWS:
+        stats = results["flows"].get(flow)
+        if stats:
+            print(f"{flow:<16}{stats['runs']:>6}{stats['p50_ms']:>10}{stats['p95_ms']:>10}")
+    print(f"\nWrite throughput: {results['writes_per_second']} submissions/s with {args.workers} workers")
+    print(f"\n{'Storage op':<30}{'ms':>10}{'peak KB':>10}")
+    for op, stats in results["storage"].items():
+        print(f"{op:<30}{stats['ms']:>10}{stats['peak_kb']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
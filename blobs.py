@@ -0,0 +1,68 @@
+import hashlib
+import os
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Streamlit copies previewed media and downloads into server memory, so larger files are offered
+# for download only, never previewed inline.
+PREVIEW_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+
+class BlobStore:
+    """
+    Content-addressed storage for uploaded submission files.
+    Each file is written once under its SHA-256 digest, so re-uploads of the same file share one copy.
+    """
+
+    def __init__(self, root="uploads"):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ref):
+        """Returns the on-disk path for a blob reference like 'sha256:ab12...'."""
+        digest = ref.split(":", 1)[-1]
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, ref):
+        return bool(ref) and os.path.exists(self.path(ref))
+
+    def put(self, fileobj, chunk_size=CHUNK_SIZE):
+        """
+        Copies fileobj to the store chunk by chunk, hashing as it goes, and returns its reference.
+        Memory use stays at one chunk regardless of file size.
+        """
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+        sha = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                    sha.update(chunk)
+                    out.write(chunk)
+            ref = "sha256:" + sha.hexdigest()
+            final_path = self.path(ref)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return ref
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def size(self, ref):
+        """Returns the size of a stored blob in bytes."""
+        return os.path.getsize(self.path(ref))
+
+    def open(self, ref):
+        """Opens a stored blob for reading in binary mode."""
+        return open(self.path(ref), "rb")
+
+    def read(self, ref):
+        """Returns a stored blob's bytes, closing the file before returning."""
+        with self.open(ref) as f:
+            return f.read()
@@ -0,0 +1,77 @@
+import os
+from datetime import datetime
+
+import repository
+import storage
+
+# --------------------------
+# SEED DATA
+# --------------------------
+# Predefined list of tasks for assignment: Day, Element, Task Name, Description, Resources
+TASKS_DATA = [
+    ["Day 1", "LM Soma Time", "Spot the Logic", "Play a game of *Spot It!* to identify logic-based sequences.", "Building blocks, puzzles, problem-solving worksheets"],
+    ["Day 1", "KIN Siri Time", "Express Through Movement", "Mimic emotions through movement in response to music or images.", "Music, scarves, props"],
+    ["Day 1", "KIN Solver Time", "Tangled Team Escape", "Work as a team to untangle a *Human Knot*.", "Ropes, small objects for team tasks"],
+    ["Day 1", "LM Soma Time", "Data Detective", "Analyze a dataset to determine patterns and trends.", "Graph paper, calculators, data analysis charts"],
+    ["Day 2", "LM Soma Time", "Predict the Pattern", "Guess the next item in a logic sequence.", "Pattern blocks, prediction exercises"],
+    ["Day 2", "KIN Siri Time", "Acrobat's Flow", "Perform a sequence of controlled acrobatic movements focusing on balance and strength.", "Exercise mats, safety pads"],
+    ["Day 2", "KIN Solver Time", "Speed & Agility Race", "Complete a series of physical coordination challenges such as ladder drills and obstacle navigation.", "Jump ropes, reaction speed tools"],
+    ["Day 2", "LM Soma Time", "Color Code Challenge", "Sort and arrange items based on a color and pattern logic rule.", "Color sorting games, sequencing cards"],
+    ["Day 2", "LM Siri Time", "Chart the Data", "Analyze bar charts to identify key statistical insights and predict trends.", "Bar charts, statistical datasets"],
+    ["Day 2", "LM Solver Time", "Solve the Mystery", "Analyze a case study to uncover logical inconsistencies and solve a problem.", "Case study problems, debate prompts"],
+    ["Day 3", "LM Solver Time", "Master of Strategy", "Play a board game like chess and explain strategic moves.", "Board games, scenario-based challenges"],
+    ["Day 3", "LM Soma Time", "Number Puzzle Challenge", "Solve mathematical puzzles using operations like addition, subtraction, multiplication, and division.", "Math manipulatives, counters"],
+    ["Day 3", "KIN Siri Time", "Steady Hands", "Complete a dexterity test by threading beads or sculpting fine details in clay.", "Fine motor skill activities (clay, threading beads)"],
+    ["Day 3", "LM Solver Time", "Master of Strategy", "Play a board game like chess and explain strategic moves.", "Board games, scenario-based challenges"],
+    ["Day 3", "LM Soma Time", "Mind's Eye", "Interpret abstract optical illusions and explain their logical or artistic significance.", "Optical illusions, abstract art exploration"],
+    ["Day 3", "KIN Siri Time", "Fast Reflex Test", "Perform a reaction-time challenge using stopwatches and movement drills.", "Stopwatches, fast-paced movement drills"],
+    ["Day 3", "Solver Time", "Virtual Problem-Solver", "Engage in a VR-based real-world simulation and solve a presented challenge.", "VR headset or interactive AR experience for simulations"],
+    ["Day 4", "Soma & Siri Time", "Professional Interview", "Prepare and conduct an interview at the field trip location.", "Notebook, field trip guide"],
+    ["Day 4", "Soma & Siri Time", "Field Trip to Observe Real-World Practitioners", "Visit Apollo space center, and gymnastics/Acrobatics Training Center"],
+    ["Day 4", "Solver Time", "Hands-on Industry Engagement", "Interview professionals using Kinesthetic and Logical-Mathematical Intelligence"],
+    ["Day 4", "Siri Time", "Reflection & Discussion", "Journaling and group discussion on field trip learnings"],
+]
+
+# Uwazi Rubric-Based Rating with detailed descriptions, and the XP each earns
+UWAZI_RUBRIC = {
+    "🪨 Struggles - Needs significant support": 5,
+    "🌿 Beginning - Identifies some elements with help but no solution": 10,
+    "🍁 Progressing - Understands key steps but needs guidance for final answer": 15,
+    "🌳 Independent - Solves the problem with logical reasoning": 25,
+    "🌻 Mastery - Solves quickly, explains reasoning, and applies learning": 30
+}
+
+# --------------------------
+# MIGRATIONS
+# --------------------------
+def seed_tasks(repo):
+    repo.insert_new("tasks", [dict(zip(repository.TABLES["tasks"], task)) for task in TASKS_DATA])
+
+
+# (version, description, function(repo)), applied once each in version order.
+# Add new steps at the end with the next version number; never renumber or edit applied ones.
+# Steps must be safe to run twice (write with insert_new): workers on different hosts sharing one
+# database can both start a step before either has recorded it.
+MIGRATIONS = [
+    (1, "Seed the task list", seed_tasks),
+]
+
+
+def run(repo, lock_path=None):
+    """
+    Applies every migration not yet recorded in the migrations table.
+    Called once per server process. The lock makes workers on one host run each step once; across
+    hosts the backend's unique keys keep a step's rows and its migrations record from doubling up.
+    """
+    lock_path = lock_path or os.path.join(os.environ.get("UWAZI_DATA_DIR", "."), "uwazi-bootstrap")
+    with storage.locked(lock_path):
+        applied = {int(version) for version in repo.find("migrations", columns=["Version"])["Version"].dropna()}
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(repo)
+            repo.insert_new("migrations", [{
+                "Version": version,
+                "Name": name,
+                "Applied": datetime.now().strftime(repository.DATETIME_FORMAT),
+            }])
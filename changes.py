@@ -0,0 +1,85 @@
+import threading
+import time
+
+# How often the watcher thread re-checks table versions for writes by other processes, in seconds.
+POLL_INTERVAL = 1.0
+
+
+class ChangeFeed:
+    """
+    Tracks every table's storage version from one background thread per server process.
+
+    Readers key their caches on version(table) instead of probing storage on every rerun, and live
+    panels compare cursor(tables) with what they last showed to tell whether anything they display
+    has changed. Writes made by this process are published at once; writes by other processes are
+    picked up within POLL_INTERVAL.
+    """
+
+    def __init__(self, repo, tables, interval=POLL_INTERVAL):
+        self.repo = repo
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.versions = {table: repo.version(table) for table in tables}
+        self.sequence = {table: 0 for table in tables}
+
+    def _check(self, table):
+        version = self.repo.version(table)
+        with self.lock:
+            if version != self.versions[table]:
+                self.versions[table] = version
+                self.sequence[table] += 1
+
+    def publish(self, table):
+        """Records that this process just wrote to table."""
+        self._check(table)
+
+    def start(self):
+        """Starts the watcher thread."""
+        def run():
+            while True:
+                time.sleep(self.interval)
+                for table in self.versions:
+                    try:
+                        self._check(table)
+                    except (OSError, ValueError):
+                        continue
+
+        thread = threading.Thread(target=run, name="change-feed", daemon=True)
+        thread.start()
+        return thread
+
+    def version(self, table):
+        """The table's storage version as of the last check."""
+        with self.lock:
+            return self.versions[table]
+
+    def cursor(self, tables):
+        """A value that changes whenever any of tables changes; compare it with one saved earlier."""
+        with self.lock:
+            return tuple(self.sequence[table] for table in tables)
+
+
+class FeedCache:
+    """
+    Base for in-memory caches built from storage tables (indexes, rollups, review queues, analytics).
+
+    Subclasses implement _reload(), which compares the tables' storage versions with the ones the
+    cache was built at and rebuilds if they differ, and call _refresh() before every read. With a
+    ChangeFeed, _refresh() skips _reload() (and so every storage probe) until the feed has seen a
+    write to one of the tables; without one, every read reloads as needed.
+    """
+
+    def __init__(self, feed, tables):
+        self.feed = feed
+        self.feed_tables = tuple(tables)
+        self.feed_cursor = None
+
+    def _reload(self):
+        raise NotImplementedError
+
+    def _refresh(self):
+        cursor = self.feed.cursor(self.feed_tables) if self.feed else None
+        if cursor is not None and cursor == self.feed_cursor:
+            return
+        self._reload()
+        self.feed_cursor = cursor
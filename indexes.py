@@ -0,0 +1,96 @@
+import threading
+
+import pandas as pd
+
+from changes import FeedCache
+
+# Lookups the dashboards make on every rerun: table -> list of key column groups.
+INDEXED_LOOKUPS = {
+    "students": [["Class Code"]],
+    "assignments": [["Student"]],
+    "submissions": [["Student"], ["Student", "Task Name"]],
+    "sessions": [["Class Code"]],
+    "tasks": [["Day"]],
+    "jobs": [["Submission ID"]],
+    "timings": [["Student", "Task Name"]],
+}
+
+# --------------------------
+# SINGLE INDEX
+# --------------------------
+class Index(FeedCache):
+    """
+    Rows of one table grouped by key columns for O(1) lookups.
+    Built once per table version and patched in place when this process writes.
+    """
+
+    def __init__(self, repo, table, columns, feed=None):
+        super().__init__(feed, [table])
+        self.repo = repo
+        self.table = table
+        self.columns = list(columns)
+        self.version = None
+        self.table_columns = []
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def _key(self, row):
+        return tuple(row.get(col) for col in self.columns)
+
+    def _add_rows(self, rows):
+        for row in rows:
+            self.buckets.setdefault(self._key(row), []).append(row)
+
+    def _reload(self):
+        version = self.repo.version(self.table)
+        if version == self.version:
+            return
+        df = self.repo.find(self.table)
+        self.table_columns = df.columns.tolist()
+        self.buckets = {}
+        self._add_rows(df.to_dict("records"))
+        self.version = version
+
+    def lookup(self, where):
+        """Returns the rows whose key columns equal where's values as a DataFrame."""
+        key = tuple(where[col] for col in self.columns)
+        with self.lock:
+            self._refresh()
+            rows = list(self.buckets.get(key, []))
+            return pd.DataFrame(rows, columns=self.table_columns)
+
+    def record_write(self, rows, version_before, version_after):
+        """
+        Patches the index with rows this process just wrote. If the index was not at version_before
+        (someone else wrote in between), it is left stale and rebuilds on the next lookup.
+        """
+        with self.lock:
+            if self.version is not None and self.version == version_before:
+                rows = [dict(row) for row in rows]
+                for row in rows:
+                    self.table_columns += [col for col in row if col not in self.table_columns]
+                self._add_rows(rows)
+                self.version = version_after
+
+# --------------------------
+# INDEXES FOR ALL TABLES
+# --------------------------
+class IndexSet:
+    """The indexes for every lookup in INDEXED_LOOKUPS, sharing one repository."""
+
+    def __init__(self, repo, lookups=INDEXED_LOOKUPS, feed=None):
+        self.indexes = {
+            (table, frozenset(columns)): Index(repo, table, columns, feed)
+            for table, column_groups in lookups.items()
+            for columns in column_groups
+        }
+
+    def get(self, table, where):
+        """Returns the index answering an equality lookup on where's columns, or None."""
+        return self.indexes.get((table, frozenset(where)))
+
+    def record_write(self, table, rows, version_before, version_after):
+        """Passes a write on to every index over table."""
+        for (indexed_table, _), index in self.indexes.items():
+            if indexed_table == table:
+                index.record_write(rows, version_before, version_after)
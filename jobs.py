@@ -0,0 +1,199 @@
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import blobs
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are skipped when Pillow is not installed
+    Image = None
+
+QUEUED, RUNNING, DONE, FAILED = "Queued", "Running", "Done", "Failed"
+
+MAX_ATTEMPTS = 3
+
+# A Running job not finished within this long is assumed lost with its worker and is retried.
+STALE_AFTER = timedelta(minutes=10)
+
+THUMBNAIL_SIZE = (320, 320)
+
+# --------------------------
+# JOB HANDLERS
+# --------------------------
+def ai_feedback(text):
+    """Simple AI-generated feedback for text submissions."""
+    if not text:
+        return "No response provided."
+    elif len(text) < 50:
+        return "Try expanding your response with more details."
+    elif "because" in text or "reason" in text:
+        return "Great job explaining your reasoning!"
+    else:
+        return "Good effort! Consider adding examples or deeper insights."
+
+
+def text_feedback(payload, blob_root):
+    """Feedback on a text submission, read back from the blob store."""
+    store = blobs.BlobStore(blob_root)
+    if not store.exists(payload.get("File Ref")):
+        return ai_feedback("")
+    with store.open(payload["File Ref"]) as f:
+        return ai_feedback(f.read().decode("utf-8", errors="replace"))
+
+
+def image_thumbnail(payload, blob_root):
+    """Stores a small JPEG preview of an uploaded image and returns its blob reference."""
+    store = blobs.BlobStore(blob_root)
+    with store.open(payload["File Ref"]) as f:
+        image = Image.open(f)
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=80)
+    return store.put(buffer)
+
+
+# Job kind -> handler(payload, blob_root). Handlers run in worker processes, so they take
+# plain data and return a string; add heavier scoring or media processing here.
+HANDLERS = {
+    "feedback": text_feedback,
+    "thumbnail": image_thumbnail,
+}
+
+
+def run_handler(kind, payload, blob_root):
+    return HANDLERS[kind](payload, blob_root)
+
+
+def jobs_for(file_type):
+    """Job kinds to run for a new submission of the given file type."""
+    if file_type == "text":
+        return ["feedback"]
+    if Image is not None and str(file_type).startswith("image/"):
+        return ["thumbnail"]
+    return []
+
+
+def latest_jobs(df):
+    """Reduces a jobs table to each job's latest status row."""
+    return df.drop_duplicates("Job ID", keep="last")
+
+@contextmanager
+def _bare_main():
+    # Streamlit runs the app script as __main__, and a new worker process re-runs __main__ before
+    # it takes jobs. Workers started under this see an empty __main__ and import only this module.
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+# --------------------------
+# JOB QUEUE
+# --------------------------
+class JobQueue:
+    """
+    Runs submission post-processing on a process pool so the submitting rerun returns at once.
+
+    Every state change is appended to the "jobs" table as a (Job ID, Status, Attempt) row through
+    insert_new, so a job is claimed by exactly one worker even across server processes, and a
+    restarted server picks up whatever was left queued or running.
+    """
+
+    def __init__(self, repo, blob_root, workers=None, on_write=None):
+        self.repo = repo
+        self.blob_root = blob_root
+        self.workers = workers or os.cpu_count()
+        self.on_write = on_write
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _executor(self):
+        with self.lock:
+            if self.pool is None:
+                # Workers come from a fork server rather than forking this process, which runs
+                # server, compactor and change-feed threads whose held locks a fork would copy
+                self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("forkserver"))
+            return self.pool
+
+    def _drop_pool(self, pool):
+        # A worker that dies (killed for memory, or crashing in a handler) breaks its whole pool;
+        # the next _executor() call starts a fresh one
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False)
+
+    def _append(self, job, status, attempt, result=""):
+        row = dict(job, **{
+            "Status": status,
+            "Attempt": attempt,
+            "Result": result,
+            "Updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        rows, version_before, version_after = self.repo.insert_new("jobs", [row])
+        if rows and self.on_write:
+            self.on_write("jobs", rows, version_before, version_after)
+        return bool(rows)
+
+    def submit(self, kind, submission_id, payload):
+        """Queues one job for a submission and returns its ID. Submitting the same job twice is a no-op."""
+        job = {
+            "Job ID": f"{submission_id}-{kind}",
+            "Kind": kind,
+            "Submission ID": submission_id,
+            "Payload": json.dumps(payload),
+        }
+        if self._append(job, QUEUED, 0):
+            self._dispatch(job, 1)
+        return job["Job ID"]
+
+    def _dispatch(self, job, attempt):
+        # Only the worker whose Running row lands first gets to run this attempt
+        if not self._append(job, RUNNING, attempt):
+            return
+        args = (run_handler, job["Kind"], json.loads(job["Payload"]), self.blob_root)
+        # Workers are started on demand inside submit()
+        with _bare_main():
+            pool = self._executor()
+            try:
+                future = pool.submit(*args)
+            except BrokenProcessPool:
+                self._drop_pool(pool)
+                future = self._executor().submit(*args)
+        future.add_done_callback(lambda done: self._finish(job, attempt, done))
+
+    def _finish(self, job, attempt, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            if attempt < MAX_ATTEMPTS:
+                self._dispatch(job, attempt + 1)
+            else:
+                self._append(job, FAILED, attempt, f"{type(e).__name__}: {e}")
+            return
+        self._append(job, DONE, attempt, result)
+
+    def resume(self):
+        """Re-dispatches jobs left queued, or running for longer than STALE_AFTER, by an earlier server run."""
+        now = datetime.now()
+        for job in latest_jobs(self.repo.find("jobs")).to_dict("records"):
+            status, attempt = job["Status"], int(job["Attempt"])
+            updated = datetime.strptime(str(job["Updated"]), "%Y-%m-%d %H:%M:%S")
+            stale = status == RUNNING and now - updated > STALE_AFTER
+            if status != QUEUED and not stale:
+                continue
+            job = {col: job[col] for col in ("Job ID", "Kind", "Submission ID", "Payload")}
+            if attempt < MAX_ATTEMPTS:
+                self._dispatch(job, attempt + 1)
+            else:
+                self._append(job, FAILED, attempt, "Worker lost on the last attempt")
@@ -0,0 +1,119 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from changes import FeedCache
+
+PENDING = "Pending"
+
+LEADERBOARD_COLUMNS = ["Student", "Total XP", "Total Umeme", "Rated", "Pending Review"]
+
+
+def _points(value):
+    """Reads an XP/Umeme cell as an int, treating blanks and junk as 0."""
+    value = pd.to_numeric(value, errors="coerce")
+    return 0 if pd.isna(value) else int(value)
+
+
+def _empty_rollup():
+    return {"Total XP": 0, "Total Umeme": 0, "Submitted": 0, "Ratings": Counter()}
+
+
+class ScoreRollups(FeedCache):
+    """
+    Per-student totals over the scores ledger: XP, Umeme, rating distribution and pending reviews.
+    Built once per ledger version and updated row by row when this process writes a score,
+    so reading a student's or a class's totals never scans the ledger.
+    """
+
+    def __init__(self, repo, feed=None):
+        super().__init__(feed, ["scores"])
+        self.repo = repo
+        self.version = None
+        self.students = {}
+        self.lock = threading.Lock()
+
+    def _add_rows(self, rows):
+        for row in rows:
+            rollup = self.students.setdefault(row["Student"], _empty_rollup())
+            rollup["Total XP"] += _points(row.get("XP"))
+            rollup["Total Umeme"] += _points(row.get("Umeme"))
+            if row.get("Rating") == PENDING:
+                rollup["Submitted"] += 1
+            elif isinstance(row.get("Rating"), str):
+                rollup["Ratings"][row["Rating"]] += 1
+
+    def _rebuild(self, version):
+        ledger = self.repo.find("scores", columns=["Student", "XP", "Umeme", "Rating"])
+        ledger["XP"] = pd.to_numeric(ledger["XP"], errors="coerce").fillna(0).astype(int)
+        ledger["Umeme"] = pd.to_numeric(ledger["Umeme"], errors="coerce").fillna(0).astype(int)
+        totals = ledger.groupby("Student")[["XP", "Umeme"]].sum()
+        submitted = ledger[ledger["Rating"] == PENDING].groupby("Student").size()
+        rated = ledger[ledger["Rating"].notna() & (ledger["Rating"] != PENDING)]
+        ratings = rated.groupby(["Student", "Rating"]).size()
+
+        self.students = {}
+        for student, row in totals.iterrows():
+            rollup = _empty_rollup()
+            rollup["Total XP"] = int(row["XP"])
+            rollup["Total Umeme"] = int(row["Umeme"])
+            rollup["Submitted"] = int(submitted.get(student, 0))
+            self.students[student] = rollup
+        for (student, rating), count in ratings.items():
+            self.students[student]["Ratings"][rating] = int(count)
+        self.version = version
+
+    def _reload(self):
+        version = self.repo.version("scores")
+        if version != self.version:
+            self._rebuild(version)
+
+    def record_write(self, rows, version_before, version_after):
+        """Folds rows this process just appended to the ledger into the totals."""
+        with self.lock:
+            if self.version is not None and self.version == version_before:
+                self._add_rows(rows)
+                self.version = version_after
+
+    def _totals(self, name):
+        rollup = self.students.get(name, _empty_rollup())
+        rated = sum(rollup["Ratings"].values())
+        return {
+            "Total XP": rollup["Total XP"],
+            "Total Umeme": rollup["Total Umeme"],
+            "Rated": rated,
+            "Pending Review": max(rollup["Submitted"] - rated, 0),
+            "Ratings": Counter(rollup["Ratings"]),
+        }
+
+    def student(self, name):
+        """Returns one student's totals: Total XP, Total Umeme, Rated, Pending Review and Ratings."""
+        with self.lock:
+            self._refresh()
+            return self._totals(name)
+
+    def leaderboard(self, students=None, limit=None):
+        """
+        Ranks students (all of them, or just the given names, e.g. one class) by XP then Umeme.
+        Cost depends on the number of students ranked, not on the size of the ledger.
+        """
+        with self.lock:
+            self._refresh()
+            names = list(self.students) if students is None else list(dict.fromkeys(students))
+            rows = [{"Student": name, **self._totals(name)} for name in names]
+        board = pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+        board = board.sort_values(["Total XP", "Total Umeme"], ascending=False, ignore_index=True)
+        board.index += 1
+        return board.head(limit) if limit else board
+
+    def class_totals(self, students):
+        """Sums the totals of a class's students, including the rating distribution."""
+        totals = {"Total XP": 0, "Total Umeme": 0, "Rated": 0, "Pending Review": 0, "Ratings": Counter()}
+        with self.lock:
+            self._refresh()
+            for name in dict.fromkeys(students):
+                rollup = self._totals(name)
+                for key in totals:
+                    totals[key] += rollup[key]
+        return totals
@@ -0,0 +1,200 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (ms) of the latency histogram buckets, Prometheus style.
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf")]
+
+RECENT_SAMPLES = 1000
+RECENT_RERUNS = 200
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class OperationStats:
+    """Running totals and a latency histogram for one named operation."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, elapsed_ms, rows, nbytes):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.bytes += nbytes
+        self.recent.append(elapsed_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class Profiler:
+    """
+    Collects timings for storage calls and dashboard sections.
+    Operations are aggregated per process; each rerun also keeps its own list of what it did.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.reruns = deque(maxlen=RECENT_RERUNS)
+        self.local = threading.local()
+
+    def record(self, name, elapsed_ms, rows=0, nbytes=0):
+        """Adds one timed call of operation name, with rows read and bytes written."""
+        with self.lock:
+            self.operations.setdefault(name, OperationStats()).add(elapsed_ms, rows, nbytes)
+        rerun = getattr(self.local, "rerun", None)
+        if rerun is not None:
+            rerun["ops"].append({"name": name, "ms": round(elapsed_ms, 3), "rows": rows, "bytes": nbytes})
+            if name.startswith("read:"):
+                rerun["rows_read"] += rows
+            rerun["bytes_written"] += nbytes
+
+    @contextmanager
+    def timed(self, name):
+        """Times the block as operation name. Set 'rows'/'bytes' on the yielded dict to record volumes."""
+        volume = {"rows": 0, "bytes": 0}
+        start = time.perf_counter()
+        try:
+            yield volume
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, volume["rows"], volume["bytes"])
+
+    def begin_rerun(self):
+        """Starts collecting operations for the script run on this thread."""
+        self.local.rerun = {"started": time.time(), "start": time.perf_counter(), "ops": [], "rows_read": 0, "bytes_written": 0}
+
+    def end_rerun(self, section):
+        """Closes the current rerun, records its total latency under 'rerun:<section>' and keeps its summary."""
+        rerun = getattr(self.local, "rerun", None)
+        if rerun is None:
+            return
+        self.local.rerun = None
+        elapsed_ms = (time.perf_counter() - rerun.pop("start")) * 1000
+        self.record(f"rerun:{section}", elapsed_ms, rerun["rows_read"], rerun["bytes_written"])
+        rerun.update(section=section, latency_ms=round(elapsed_ms, 3))
+        with self.lock:
+            self.reruns.append(rerun)
+
+    def summary(self):
+        """Returns one dict per operation: calls, mean/p50/p95/max latency, rows read and bytes written."""
+        with self.lock:
+            return [
+                {
+                    "Operation": name,
+                    "Calls": stats.count,
+                    "Mean ms": round(stats.total_ms / stats.count, 2),
+                    "p50 ms": round(_percentile(stats.recent, 0.50), 2),
+                    "p95 ms": round(_percentile(stats.recent, 0.95), 2),
+                    "Max ms": round(stats.max_ms, 2),
+                    "Rows Read": stats.rows,
+                    "Bytes Written": stats.bytes,
+                }
+                for name, stats in sorted(self.operations.items())
+            ]
+
+    def histogram(self, name):
+        """Returns {bucket label: count} for one operation's latencies."""
+        with self.lock:
+            stats = self.operations.get(name)
+            counts = stats.buckets if stats else [0] * len(LATENCY_BUCKETS_MS)
+        labels = [f"≤{bound:g} ms" for bound in LATENCY_BUCKETS_MS[:-1]] + [f">{LATENCY_BUCKETS_MS[-2]:g} ms"]
+        return dict(zip(labels, counts))
+
+    def recent_reruns(self):
+        with self.lock:
+            return list(self.reruns)
+
+    def to_jsonl(self):
+        """Recent reruns, one JSON object per line."""
+        return "".join(json.dumps(rerun, default=str) + "\n" for rerun in self.recent_reruns())
+
+    def to_prometheus(self):
+        """All operations in the Prometheus text exposition format."""
+        lines = [
+            "# HELP uwazi_operation_latency_ms Latency of storage operations, dashboard sections and reruns.",
+            "# TYPE uwazi_operation_latency_ms histogram",
+        ]
+        with self.lock:
+            operations = [(_label(name), stats) for name, stats in sorted(self.operations.items())]
+            for label, stats in operations:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS_MS, stats.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else str(bound)
+                    lines.append(f'uwazi_operation_latency_ms_bucket{{operation="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'uwazi_operation_latency_ms_sum{{operation="{label}"}} {stats.total_ms:.3f}')
+                lines.append(f'uwazi_operation_latency_ms_count{{operation="{label}"}} {stats.count}')
+            lines.append("# TYPE uwazi_rows_read_total counter")
+            for label, stats in operations:
+                lines.append(f'uwazi_rows_read_total{{operation="{label}"}} {stats.rows}')
+            lines.append("# TYPE uwazi_bytes_written_total counter")
+            for label, stats in operations:
+                lines.append(f'uwazi_bytes_written_total{{operation="{label}"}} {stats.bytes}')
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedRepository:
+    """Wraps a repository.Repository so every read and write is timed by the profiler."""
+
+    def __init__(self, repo, profiler):
+        self.repo = repo
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
+
+    def find(self, table, where=None, columns=None):
+        with self.profiler.timed(f"read:{table}") as volume:
+            df = self.repo.find(table, where, columns)
+            volume["rows"] = len(df)
+        return df
+
+    def insert_many(self, table, rows):
+        with self.profiler.timed(f"write:{table}") as volume:
+            result = self.repo.insert_many(table, rows)
+            volume["bytes"] = _payload_size(rows)
+        return result
+
+    def insert(self, table, row):
+        return self.insert_many(table, [row])
+
+    def insert_new(self, table, rows):
+        with self.profiler.timed(f"write:{table}") as volume:
+            result = self.repo.insert_new(table, rows)
+            volume["bytes"] = _payload_size(result[0])
+        return result
+
+    def all(self, table):
+        return self.find(table)
+
+    def is_empty(self, table):
+        return self.find(table).empty
+
+
+def _label(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _payload_size(rows):
+    # Size of the rows as JSON: a backend-neutral measure of how much was written
+    return len(json.dumps(rows, default=str).encode("utf-8"))
+
+
+PROFILER = Profiler()
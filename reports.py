@@ -0,0 +1,43 @@
+import io
+import zipfile
+
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 10_000
+
+
+def filter_rows(df, class_code=None, students=None, day=None, date_range=None):
+    """
+    Narrows an admin table to the selected class, students, day and submission date range.
+    Each filter only applies to tables that have the matching column.
+    """
+    if class_code and "Class Code" in df:
+        df = df[df["Class Code"] == class_code]
+    student_column = "Student" if "Student" in df else "Student Name" if "Student Name" in df else None
+    if students is not None and student_column:
+        df = df[df[student_column].isin(students)]
+    if day and "Day" in df:
+        df = df[df["Day"] == day]
+    if date_range and "Submission Time" in df:
+        start, end = date_range
+        dates = pd.to_datetime(df["Submission Time"], errors="coerce").dt.date
+        df = df[(dates >= start) & (dates <= end)]
+    return df
+
+
+def iter_csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yields df as CSV text a chunk of rows at a time, header first."""
+    yield df.head(0).to_csv(index=False)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False)
+
+
+def zip_tables(tables, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Writes each DataFrame in tables (file name -> df) into one zip archive and returns its bytes."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for file_name, df in tables.items():
+            with archive.open(file_name, "w") as entry:
+                for chunk in iter_csv_chunks(df, chunk_rows):
+                    entry.write(chunk.encode("utf-8"))
+    return buffer.getvalue()
@@ -0,0 +1,682 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+import storage
+
+# --------------------------
+# TABLE DEFINITIONS
+# --------------------------
+TABLES = {
+    "classes": ["Class Code", "Class Name", "CSE", "Class Key"],
+    "students": ["Student Name", "Class Code"],
+    "tasks": ["Day", "Element", "Task Name", "Description", "Resources"],
+    "assignments": ["Student", "Task Name", "Day", "Time Block", "CSE"],
+    "scores": ["Student", "XP", "Rating", "Umeme", "Score ID", "Submission ID"],
+    "submissions": ["Student", "Task Name", "File Type", "File Name", "Submission Time", "Start Time", "Day", "Time Block", "Feedback", "File Ref", "Submission ID"],
+    "sessions": ["Class Code", "Session Status"],
+    "jobs": ["Job ID", "Kind", "Submission ID", "Status", "Attempt", "Payload", "Result", "Updated"],
+    "timings": ["Student", "Task Name", "Start Time"],
+    "migrations": ["Version", "Name", "Applied"],
+}
+
+# Column types. Columns not listed are text, so codes like "012e45" survive a round trip;
+# "int" columns are nullable integers and "datetime" columns are parsed from DATETIME_FORMAT.
+SCHEMAS = {
+    "scores": {"XP": "int", "Umeme": "int"},
+    "submissions": {"Submission Time": "datetime", "Start Time": "datetime"},
+    "jobs": {"Attempt": "int", "Updated": "datetime"},
+    "timings": {"Start Time": "datetime"},
+    "migrations": {"Version": "int", "Applied": "datetime"},
+}
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns the dashboards look rows up by. SQLite and MongoDB build an index on each.
+INDEXES = {
+    "classes": [["Class Code"], ["Class Name"], ["CSE"]],
+    "students": [["Class Code"], ["Student Name"]],
+    "tasks": [["Day"]],
+    "assignments": [["Student"], ["Student", "Task Name", "Day"]],
+    "scores": [["Student"], ["Score ID"]],
+    "submissions": [["Student", "Task Name"], ["Submission ID"]],
+    "sessions": [["Class Code"]],
+    "jobs": [["Submission ID"], ["Job ID"]],
+    "timings": [["Student", "Task Name"]],
+}
+
+# Columns identifying a row for insert_new(). A second write with the same key is dropped,
+# which makes retried or double-clicked writes (and racing workers) harmless.
+UNIQUE_KEYS = {
+    "classes": ["Class Key"],
+    "students": ["Student Name", "Class Code"],
+    "assignments": ["Student", "Task Name", "Day"],
+    "sessions": ["Class Code", "Session Status"],
+    "submissions": ["Submission ID"],
+    "scores": ["Score ID"],
+    "jobs": ["Job ID", "Status", "Attempt"],
+    "timings": ["Student", "Task Name"],
+    "tasks": ["Day", "Task Name"],
+    "migrations": ["Version"],
+}
+
+
+CSV_FILES = {
+    "classes": "classes.csv",
+    "students": "students.csv",
+    "tasks": "tasks_list.csv",
+    "assignments": "tasks_assigned.csv",
+    "scores": "scores.csv",
+    "submissions": "submissions.csv",
+    "sessions": "sessions.csv",
+    "jobs": "jobs.csv",
+    "timings": "task_timings.csv",
+    "migrations": "migrations.csv",
+}
+
+# Key columns used by CSV compaction to keep only the latest row per key.
+# Ledgers (scores, submissions, jobs) have no key and are never collapsed.
+COMPACTION_KEYS = {
+    "classes": ["Class Code"],
+    "students": ["Student Name", "Class Code"],
+    "assignments": ["Student", "Task Name", "Day"],
+    "sessions": ["Class Code"],
+}
+
+
+def empty_frame(table):
+    """Returns an empty DataFrame with the table's columns."""
+    return pd.DataFrame(columns=TABLES[table])
+
+
+def apply_schema(df, table):
+    """Casts df's columns to the table's SCHEMAS types, whatever the backend handed back."""
+    for col, kind in SCHEMAS.get(table, {}).items():
+        if col not in df:
+            continue
+        if kind == "int":
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+        else:
+            df[col] = pd.to_datetime(df[col], errors="coerce", format=DATETIME_FORMAT)
+    return df
+
+
+def _projection(table, columns, where):
+    # Columns to read: the requested ones (or all), plus any needed to evaluate where
+    columns = list(columns or TABLES[table])
+    return columns + [col for col in (where or {}) if col not in columns]
+
+
+def _key_value(value):
+    # Keys are compared as text so a CSV read ("12") and a fresh write (12) agree
+    return "" if value is None or pd.isna(value) else str(value)
+
+
+def row_key(row, keys):
+    """Returns the UNIQUE_KEYS identity of a row as a tuple of strings."""
+    return tuple(_key_value(row.get(col)) for col in keys)
+
+
+def class_key(name):
+    """A class name as compared for uniqueness: case and extra spaces ignored, so "Math" and " math" match."""
+    return " ".join(_key_value(name).split()).casefold()
+
+
+# Key columns filled in from another column on every insert: column -> (source column, function).
+DERIVED_KEYS = {
+    "classes": {"Class Key": ("Class Name", class_key)},
+}
+
+
+def with_derived_keys(table, rows):
+    """Returns rows with the table's DERIVED_KEYS columns (re)computed from their sources."""
+    derived = DERIVED_KEYS.get(table)
+    if not derived:
+        return rows
+    return [dict(row, **{col: derive(row.get(source)) for col, (source, derive) in derived.items()}) for row in rows]
+
+
+def key_columns(table):
+    """The columns to read to work out the UNIQUE_KEYS keys of stored rows, derived ones included."""
+    sources = [source for source, _ in DERIVED_KEYS.get(table, {}).values()]
+    return UNIQUE_KEYS[table] + [col for col in sources if col not in UNIQUE_KEYS[table]]
+
+
+def stored_row_keys(table, df):
+    """The UNIQUE_KEYS keys of stored rows. Derived keys are recomputed, so rows saved before they existed count too."""
+    keys = UNIQUE_KEYS[table]
+    return {row_key(row, keys) for row in with_derived_keys(table, df.to_dict("records"))}
+
+def _unstored_rows(rows, keys, stored):
+    # Rows of a batch whose key is neither in stored nor earlier in the batch, and their keys;
+    # stored itself is left untouched
+    new_rows, new_keys = [], set()
+    for row in rows:
+        key = row_key(row, keys)
+        if not any(key):
+            new_rows.append(row)
+        elif key not in stored and key not in new_keys:
+            new_keys.add(key)
+            new_rows.append(row)
+    return new_rows, new_keys
+
+# --------------------------
+# REPOSITORY INTERFACE
+# --------------------------
+class Repository:
+    """
+    Storage for the app tables. `where` is a dict of column -> value
+    matched by equality; rows come back in insertion order.
+    """
+
+    def find(self, table, where=None, columns=None):
+        """
+        Returns the rows of table matching where as a DataFrame typed by SCHEMAS,
+        with only the given columns (default: all of them).
+        """
+        raise NotImplementedError
+
+    def insert_many(self, table, rows):
+        """
+        Appends rows (a list of dicts) to table. Returns the table's (version before, version after)
+        so callers holding derived state at the old version know it is safe to patch in place.
+        """
+        raise NotImplementedError
+
+    def insert_new(self, table, rows):
+        """
+        Appends only the rows whose UNIQUE_KEYS key is not stored yet, checking and writing
+        under one lock or transaction so concurrent workers cannot both insert the same key.
+        Rows with an entirely blank key carry no identity and are always appended.
+        Returns (rows inserted, version before, version after).
+        """
+        raise NotImplementedError
+
+    def version(self, table):
+        """
+        Returns a value that changes whenever table is written, by this or any other process.
+        Readers use it as a cache key.
+        """
+        raise NotImplementedError
+
+    def insert(self, table, row):
+        """Appends a single row to table."""
+        return self.insert_many(table, [row])
+
+    def all(self, table):
+        """Returns every row of table."""
+        return self.find(table)
+
+    def is_empty(self, table):
+        """True if table holds no rows."""
+        return self.find(table).empty
+
+    def start_background_tasks(self):
+        """Starts any housekeeping threads the backend needs. No-op by default."""
+
+# --------------------------
+# CSV BACKEND
+# --------------------------
+class CsvRepository(Repository):
+    """Keeps each table in its own CSV file, appending rows via storage.append_rows."""
+
+    def __init__(self, data_dir="."):
+        self.files = {table: os.path.join(data_dir, name) for table, name in CSV_FILES.items()}
+        self.key_sets = {}
+        for table, file_path in self.files.items():
+            if not os.path.exists(file_path):
+                storage.atomic_write(file_path, empty_frame(table))
+            else:
+                storage.ensure_columns(file_path, TABLES[table])
+
+    def find(self, table, where=None, columns=None):
+        usecols = _projection(table, columns, where)
+        df = pd.read_csv(self.files[table], dtype=str, usecols=lambda col: col in usecols)
+        for column, value in (where or {}).items():
+            df = df[df[column] == value]
+        return apply_schema(df[[col for col in columns or df.columns]], table)
+
+    def insert_many(self, table, rows):
+        rows = with_derived_keys(table, rows)
+        with storage.locked(self.files[table]):
+            before = self.version(table)
+            storage.append_rows(self.files[table], rows)
+            return before, self.version(table)
+
+    def _stored_keys(self, table, version):
+        # Reuse the keys seen at our last write unless another process has written since
+        cached = self.key_sets.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+        df = pd.read_csv(self.files[table], usecols=key_columns(table), dtype=str)
+        return stored_row_keys(table, df)
+
+    def insert_new(self, table, rows):
+        keys = UNIQUE_KEYS[table]
+        rows = with_derived_keys(table, rows)
+        with storage.locked(self.files[table]):
+            before = self.version(table)
+            stored = self._stored_keys(table, before)
+            new_rows, new_keys = _unstored_rows(rows, keys, stored)
+            storage.append_rows(self.files[table], new_rows)
+            # The cached set only learns the new keys once they are on disk, so a failed write can be retried
+            after = self.version(table)
+            self.key_sets[table] = (after, stored | new_keys)
+            return new_rows, before, after
+
+    def version(self, table):
+        # Appends always grow the file, so size catches writes that land within the mtime resolution
+        stat = os.stat(self.files[table])
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def start_background_tasks(self):
+        return storage.start_compactor({self.files[table]: keys for table, keys in COMPACTION_KEYS.items()})
+
+# --------------------------
+# PARQUET BACKEND
+# --------------------------
+# A table's CSV log is folded into a new snapshot once it grows past this many bytes.
+LOG_COMPACT_BYTES = 256 * 1024
+
+ROW_GROUP_ROWS = 64 * 1024
+
+
+class ParquetRepository(Repository):
+    """
+    Keeps each table as a typed Parquet snapshot plus a small CSV log of the rows appended since.
+
+    Reads memory-map the snapshot and decode only the requested columns and the row groups that can
+    match `where`. Each snapshot records the generation of the log that follows it, so compaction
+    swaps in a new snapshot and an empty log in one atomic rename. Existing CSV tables in the data
+    folder are imported on first open; CSV remains the import/export format.
+    """
+
+    def __init__(self, data_dir=".", compact_bytes=LOG_COMPACT_BYTES):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        self.data_dir = data_dir
+        self.compact_bytes = compact_bytes
+        self.snapshots = {table: os.path.join(data_dir, f"{table}.parquet") for table in TABLES}
+        self.generations = {}
+        self.key_sets = {}
+        self.snapshot_keys = {}
+        for table, snapshot in self.snapshots.items():
+            if os.path.exists(snapshot) and self._has_all_columns(table):
+                continue
+            with storage.locked(snapshot):
+                if os.path.exists(snapshot):
+                    if not self._has_all_columns(table):
+                        self._add_columns(table)
+                    continue
+                legacy_csv = os.path.join(data_dir, CSV_FILES[table])
+                if os.path.exists(legacy_csv):
+                    df = pd.read_csv(legacy_csv, dtype=str).reindex(columns=TABLES[table])
+                else:
+                    df = empty_frame(table)
+                self._write_snapshot(table, apply_schema(df, table), 0)
+
+    def _has_all_columns(self, table):
+        return set(TABLES[table]) <= set(self.pq.read_schema(self.snapshots[table]).names)
+
+    def _add_columns(self, table):
+        # A column was added to TABLES since the snapshot was written: widen the snapshot and its log
+        generation = self._generation(table)
+        df = self.pq.read_table(self.snapshots[table]).to_pandas().reindex(columns=TABLES[table])
+        self._write_snapshot(table, apply_schema(df, table), generation)
+        log = self._log(table, generation)
+        if os.path.exists(log):
+            storage.ensure_columns(log, TABLES[table])
+
+    def _arrow_schema(self, table, generation):
+        types = {"int": self.pa.int64(), "datetime": self.pa.timestamp("s")}
+        fields = [(col, types.get(SCHEMAS.get(table, {}).get(col), self.pa.string())) for col in TABLES[table]]
+        return self.pa.schema(fields, metadata={b"log_generation": str(generation).encode()})
+
+    def _write_snapshot(self, table, df, generation):
+        snapshot = self.snapshots[table]
+        arrow_table = self.pa.Table.from_pandas(df, schema=self._arrow_schema(table, generation), preserve_index=False)
+        tmp_path = f"{snapshot}.{generation}.tmp"
+        try:
+            self.pq.write_table(arrow_table, tmp_path, row_group_size=ROW_GROUP_ROWS)
+            os.replace(tmp_path, snapshot)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _generation(self, table):
+        # Re-read the footer only when the snapshot file has been replaced
+        stat = os.stat(self.snapshots[table])
+        cached = self.generations.get(table)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        metadata = self.pq.read_schema(self.snapshots[table]).metadata or {}
+        generation = int(metadata.get(b"log_generation", b"0"))
+        self.generations[table] = ((stat.st_mtime_ns, stat.st_size), generation)
+        return generation
+
+    def _log(self, table, generation):
+        return os.path.join(self.data_dir, f"{table}.log.{generation}.csv")
+
+    def find(self, table, where=None, columns=None):
+        columns = list(columns or TABLES[table])
+        filters = [(col, "==", value) for col, value in (where or {}).items()] or None
+        arrow_table = self.pq.read_table(self.snapshots[table], columns=columns, filters=filters, memory_map=True)
+        generation = int((arrow_table.schema.metadata or {}).get(b"log_generation", b"0"))
+        df = apply_schema(arrow_table.to_pandas(), table)
+
+        log = self._log(table, generation)
+        if os.path.exists(log) and os.path.getsize(log) > 0:
+            usecols = _projection(table, columns, where)
+            recent = pd.read_csv(log, dtype=str, usecols=lambda col: col in usecols)
+            for column, value in (where or {}).items():
+                recent = recent[recent[column] == value]
+            if not recent.empty:
+                recent = apply_schema(recent[columns], table)
+                df = recent if df.empty else pd.concat([df, recent], ignore_index=True)
+        return df.reset_index(drop=True)
+
+    def _append(self, table, rows):
+        log = self._log(table, self._generation(table))
+        if not os.path.exists(log):
+            storage.atomic_write(log, empty_frame(table))
+        storage.append_rows(log, rows)
+
+    def insert_many(self, table, rows):
+        rows = with_derived_keys(table, rows)
+        with storage.locked(self.snapshots[table]):
+            before = self.version(table)
+            if rows:
+                self._append(table, rows)
+            return before, self.version(table)
+
+    def _stored_keys(self, table, version):
+        # Reuse the keys seen at our last write unless another process has written since; even then
+        # the snapshot's keys are only decoded again after a compaction, and just the log is re-read
+        cached = self.key_sets.get(table)
+        if cached and cached[0] == version:
+            return cached[1]
+        columns = key_columns(table)
+        snapshot_version = version[:2]
+        cached = self.snapshot_keys.get(table)
+        if not cached or cached[0] != snapshot_version:
+            df = apply_schema(self.pq.read_table(self.snapshots[table], columns=columns, memory_map=True).to_pandas(), table)
+            cached = (snapshot_version, stored_row_keys(table, df))
+            self.snapshot_keys[table] = cached
+        stored = set(cached[1])
+        log = self._log(table, self._generation(table))
+        if os.path.exists(log) and os.path.getsize(log) > 0:
+            stored |= stored_row_keys(table, pd.read_csv(log, dtype=str, usecols=lambda col: col in columns))
+        return stored
+
+    def insert_new(self, table, rows):
+        keys = UNIQUE_KEYS[table]
+        rows = with_derived_keys(table, rows)
+        with storage.locked(self.snapshots[table]):
+            before = self.version(table)
+            stored = self._stored_keys(table, before)
+            new_rows, new_keys = _unstored_rows(rows, keys, stored)
+            if new_rows:
+                self._append(table, new_rows)
+            after = self.version(table)
+            self.key_sets[table] = (after, stored | new_keys)
+            return new_rows, before, after
+
+    def version(self, table):
+        snapshot = os.stat(self.snapshots[table])
+        log = self._log(table, self._generation(table))
+        log_size = os.path.getsize(log) if os.path.exists(log) else 0
+        return (snapshot.st_mtime_ns, snapshot.st_size, log_size)
+
+    def compact(self, table):
+        """Folds the table's log into a new snapshot, keeping the latest row per COMPACTION_KEYS key."""
+        with storage.locked(self.snapshots[table]):
+            generation = self._generation(table)
+            df = self.find(table)
+            if table in COMPACTION_KEYS:
+                df = df.drop_duplicates(subset=COMPACTION_KEYS[table], keep="last")
+            self._write_snapshot(table, df, generation + 1)
+            # Readers still holding the previous snapshot may read its log, so only the one before goes
+            stale_log = self._log(table, generation - 1)
+            for path in (stale_log, stale_log + ".lock"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def start_background_tasks(self, interval=60):
+        def run():
+            while True:
+                time.sleep(interval)
+                for table in TABLES:
+                    try:
+                        log = self._log(table, self._generation(table))
+                        if os.path.exists(log) and os.path.getsize(log) > self.compact_bytes:
+                            self.compact(table)
+                    except (OSError, ValueError):
+                        continue
+
+        thread = threading.Thread(target=run, name="parquet-compactor", daemon=True)
+        thread.start()
+        return thread
+
+# --------------------------
+# SQLITE BACKEND
+# --------------------------
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteRepository(Repository):
+    """Keeps all tables in one SQLite database with an index per lookup column."""
+
+    def __init__(self, db_path="uwazi.db"):
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS _versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            for table, columns in TABLES.items():
+                column_defs = ", ".join(_quote(col) for col in columns)
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({column_defs})")
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({_quote(table)})")}
+                for col in columns:
+                    if col not in existing:
+                        self.conn.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)}")
+                for col, (source, derive) in DERIVED_KEYS.get(table, {}).items():
+                    # Fill derived keys on rows saved before the column existed
+                    missing = self.conn.execute(
+                        f"SELECT rowid, {_quote(source)} FROM {_quote(table)} WHERE {_quote(col)} IS NULL"
+                    ).fetchall()
+                    self.conn.executemany(
+                        f"UPDATE {_quote(table)} SET {_quote(col)} = ? WHERE rowid = ?",
+                        [(derive(value), rowid) for rowid, value in missing],
+                    )
+                for index_columns in INDEXES.get(table, []):
+                    index_name = _quote("idx_" + table + "_" + "_".join(index_columns).replace(" ", "_"))
+                    indexed = ", ".join(_quote(col) for col in index_columns)
+                    self.conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {_quote(table)} ({indexed})")
+
+    def find(self, table, where=None, columns=None):
+        where = where or {}
+        columns = list(columns or TABLES[table])
+        query = f"SELECT {', '.join(_quote(col) for col in columns)} FROM {_quote(table)}"
+        if where:
+            query += " WHERE " + " AND ".join(f"{_quote(col)} = ?" for col in where)
+        query += " ORDER BY rowid"
+        with self.lock:
+            rows = self.conn.execute(query, list(where.values())).fetchall()
+        return apply_schema(pd.DataFrame(rows, columns=columns), table)
+
+    def insert_many(self, table, rows):
+        rows = with_derived_keys(table, rows)
+        columns = TABLES[table]
+        placeholders = ", ".join("?" for _ in columns)
+        query = f"INSERT INTO {_quote(table)} ({', '.join(_quote(col) for col in columns)}) VALUES ({placeholders})"
+        values = [[row.get(col) for col in columns] for row in rows]
+        with self.lock, self.conn:
+            self.conn.executemany(query, values)
+            self._bump_version(table)
+            after = self._version(table)
+        return after - 1, after
+
+    def insert_new(self, table, rows):
+        keys = UNIQUE_KEYS[table]
+        columns = TABLES[table]
+        rows = with_derived_keys(table, rows)
+        exists_query = f"SELECT 1 FROM {_quote(table)} WHERE " + " AND ".join(f"{_quote(col)} = ?" for col in keys) + " LIMIT 1"
+        insert_query = (
+            f"INSERT INTO {_quote(table)} ({', '.join(_quote(col) for col in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        with self.lock, self.conn:
+            # IMMEDIATE takes the write lock up front, so the existence checks and inserts are one unit
+            self.conn.execute("BEGIN IMMEDIATE")
+            before = self._version(table)
+            new_rows, seen = [], set()
+            for row in rows:
+                key = row_key(row, keys)
+                if any(key):
+                    if key in seen or self.conn.execute(exists_query, [row.get(col) for col in keys]).fetchone():
+                        continue
+                    seen.add(key)
+                new_rows.append(row)
+                self.conn.execute(insert_query, [row.get(col) for col in columns])
+            if new_rows:
+                self._bump_version(table)
+            after = self._version(table)
+        return new_rows, before, after
+
+    def _version(self, table):
+        row = self.conn.execute("SELECT version FROM _versions WHERE name = ?", [table]).fetchone()
+        return row[0] if row else 0
+
+    def _bump_version(self, table):
+        self.conn.execute(
+            "INSERT INTO _versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            [table],
+        )
+
+    def version(self, table):
+        with self.lock:
+            return self._version(table)
+
+# --------------------------
+# MONGODB BACKEND
+# --------------------------
+class MongoRepository(Repository):
+    """Keeps each table in a MongoDB collection with an index per lookup column."""
+
+    def __init__(self, uri="mongodb://localhost:27017", db_name="uwazi", client=None):
+        if client is None:
+            from pymongo import MongoClient
+            client = MongoClient(uri)
+        self.db = client[db_name]
+        for table, derived in DERIVED_KEYS.items():
+            for col, (source, derive) in derived.items():
+                # Fill derived keys on documents saved before the column existed
+                for doc in self.db[table].find({col: {"$exists": False}}, {source: 1}):
+                    self.db[table].update_one({"_id": doc["_id"]}, {"$set": {col: derive(doc.get(source))}})
+        for table, index_list in INDEXES.items():
+            for index_columns in index_list:
+                self.db[table].create_index([(col, 1) for col in index_columns])
+        from pymongo.errors import DuplicateKeyError
+        for table, keys in UNIQUE_KEYS.items():
+            # insert_new's upserts are only race-free with this index in place, so it must exist
+            try:
+                self._create_unique_index(table, keys)
+            except DuplicateKeyError:
+                self._drop_duplicate_keys(table, keys)
+                self._create_unique_index(table, keys)
+
+    def _create_unique_index(self, table, keys):
+        self.db[table].create_index(
+            [(col, 1) for col in keys], unique=True, name="unique_" + "_".join(keys).replace(" ", "_"),
+            partialFilterExpression={col: {"$exists": True} for col in keys},
+        )
+
+    def _drop_duplicate_keys(self, table, keys):
+        # Keeps the earliest document per key, as insert_new would have, and removes the copies
+        # that concurrent writers left before the unique index existed
+        groups = self.db[table].aggregate([
+            {"$match": {col: {"$exists": True} for col in keys}},
+            {"$sort": {"_id": 1}},
+            {"$group": {"_id": {f"key{i}": f"${col}" for i, col in enumerate(keys)}, "ids": {"$push": "$_id"}}},
+        ])
+        copies = [doc_id for group in groups for doc_id in group["ids"][1:]]
+        if copies:
+            self.db[table].delete_many({"_id": {"$in": copies}})
+            self._bump_version(table)
+
+    def find(self, table, where=None, columns=None):
+        columns = list(columns or TABLES[table])
+        cursor = self.db[table].find(where or {}, {"_id": 0, **{col: 1 for col in columns}}).sort("_id", 1)
+        return apply_schema(pd.DataFrame(list(cursor), columns=columns), table)
+
+    def insert_many(self, table, rows):
+        rows = with_derived_keys(table, rows)
+        if not rows:
+            version = self.version(table)
+            return version, version
+        # insert_many adds _id to the dicts it is given, so hand it copies
+        self.db[table].insert_many([dict(row) for row in rows])
+        after = self._bump_version(table)
+        return after - 1, after
+
+    def _bump_version(self, table):
+        doc = self.db["_versions"].find_one_and_update(
+            {"_id": table}, {"$inc": {"version": 1}}, upsert=True, return_document=True
+        )
+        return doc["version"]
+
+    def insert_new(self, table, rows):
+        keys = UNIQUE_KEYS[table]
+        rows = with_derived_keys(table, rows)
+        before = self.version(table)
+        new_rows = []
+        for row in rows:
+            if not any(row_key(row, keys)):
+                # Stored without its blank key fields, which the unique index's partial filter then skips
+                self.db[table].insert_one({col: value for col, value in row.items() if col not in keys})
+                new_rows.append(row)
+                continue
+            # An upsert only inserts when no document has this key, atomically per document
+            result = self.db[table].update_one(
+                {col: row.get(col) for col in keys}, {"$setOnInsert": dict(row)}, upsert=True
+            )
+            if result.upserted_id is not None:
+                new_rows.append(row)
+        if not new_rows:
+            return new_rows, before, before
+        after = self._bump_version(table)
+        return new_rows, after - 1, after
+
+    def version(self, table):
+        doc = self.db["_versions"].find_one({"_id": table})
+        return doc["version"] if doc else 0
+
+# --------------------------
+# BACKEND SELECTION
+# --------------------------
+def open_repository(backend=None):
+    """
+    Opens the backend named by `backend` or the UWAZI_STORAGE environment variable:
+    "parquet" (default, UWAZI_DATA_DIR), "csv" (UWAZI_DATA_DIR), "sqlite" (UWAZI_SQLITE_PATH)
+    or "mongodb" (UWAZI_MONGO_URI, UWAZI_MONGO_DB).
+    """
+    backend = (backend or os.environ.get("UWAZI_STORAGE", "parquet")).lower()
+    if backend == "parquet":
+        return ParquetRepository(os.environ.get("UWAZI_DATA_DIR", "."))
+    if backend == "csv":
+        return CsvRepository(os.environ.get("UWAZI_DATA_DIR", "."))
+    if backend == "sqlite":
+        return SqliteRepository(os.environ.get("UWAZI_SQLITE_PATH", "uwazi.db"))
+    if backend in ("mongo", "mongodb"):
+        return MongoRepository(
+            os.environ.get("UWAZI_MONGO_URI", "mongodb://localhost:27017"),
+            os.environ.get("UWAZI_MONGO_DB", "uwazi"),
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,208 @@
+import hashlib
+import threading
+from bisect import bisect_left, insort
+
+import pandas as pd
+
+from changes import FeedCache
+
+PENDING = "Pending"
+
+# How a class's review queue is ordered.
+ORDERS = {
+    "time": "Oldest submission first",
+    "schedule": "By day and time block",
+}
+
+# The parts of each day in schedule order. A time block ranks by the first part its name mentions,
+# so "LM Soma Time" and "Soma & Siri Time" come before any Siri block, and Solver blocks come last.
+SCHEDULE_PARTS = ["Soma", "Siri", "Solver"]
+
+# Tables whose writes change a review queue.
+REVIEW_TABLES = ("students", "submissions", "scores")
+
+
+def make_submission_id(student, task, content):
+    """Idempotency key for a submission: the same work sent twice for the same task gets the same ID."""
+    return hashlib.sha256(f"{student}\x1f{task}\x1f{content}".encode("utf-8")).hexdigest()[:20]
+
+
+def submission_id_of(submission):
+    """Returns a stored submission's ID, deriving a stable one for rows saved before IDs existed."""
+    if isinstance(submission.get("Submission ID"), str):
+        return submission["Submission ID"]
+    return make_submission_id(submission["Student"], submission["Task Name"], submission["Submission Time"])
+
+
+def _text(value):
+    return "" if value is None or pd.isna(value) else str(value)
+
+
+def block_rank(time_block):
+    """Position of a time block in the day's schedule; blocks naming no known part sort last."""
+    words = _text(time_block).replace("&", " ").split()
+    return next((SCHEDULE_PARTS.index(word) for word in words if word in SCHEDULE_PARTS), len(SCHEDULE_PARTS))
+
+
+class ReviewQueue(FeedCache):
+    """
+    Unrated submissions per class, kept in review order.
+
+    Built once from the students, submissions and scores tables and patched row by row when this
+    process writes, so moving through the queue and marking a submission reviewed never rescan history.
+    A submission counts as reviewed once a score with a rating other than "Pending" points at its ID.
+    """
+
+    def __init__(self, repo, feed=None):
+        super().__init__(feed, REVIEW_TABLES)
+        self.repo = repo
+        self.versions = {}
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.submissions = {}
+        self.by_student = {}
+        self.classes_of = {}
+        self.by_class = {}
+        self.rated = set()
+        self.pending_counts = {}
+        self.orders = {}
+        self.heads = {}
+
+    # --------------------------
+    # BUILDING
+    # --------------------------
+    def _sort_key(self, submission_id, order):
+        row = self.submissions[submission_id]
+        if order == "schedule":
+            block = row.get("Time Block")
+            return (_text(row.get("Day")), block_rank(block), _text(block), _text(row.get("Submission Time")), submission_id)
+        return (_text(row.get("Submission Time")), submission_id)
+
+    def _add_to_class(self, class_code, submission_id):
+        self.by_class.setdefault(class_code, []).append(submission_id)
+        if submission_id not in self.rated:
+            self.pending_counts[class_code] = self.pending_counts.get(class_code, 0) + 1
+        for order in ORDERS:
+            keys = self.orders.get((class_code, order))
+            if keys is not None:
+                key = self._sort_key(submission_id, order)
+                insort(keys, key)
+                self.heads[(class_code, order)] = min(self.heads[(class_code, order)], bisect_left(keys, key))
+
+    def _add_students(self, rows):
+        for row in rows:
+            student, class_code = row.get("Student Name"), row.get("Class Code")
+            classes = self.classes_of.setdefault(student, set())
+            if class_code in classes:
+                continue
+            classes.add(class_code)
+            for submission_id in self.by_student.get(student, []):
+                self._add_to_class(class_code, submission_id)
+
+    def _add_submissions(self, rows):
+        for row in rows:
+            submission_id = submission_id_of(row)
+            if submission_id in self.submissions:
+                continue
+            self.submissions[submission_id] = dict(row, **{"Submission ID": submission_id})
+            self.by_student.setdefault(row["Student"], []).append(submission_id)
+            for class_code in self.classes_of.get(row["Student"], ()):
+                self._add_to_class(class_code, submission_id)
+
+    def _add_scores(self, rows):
+        for row in rows:
+            submission_id = row.get("Submission ID")
+            if not isinstance(submission_id, str) or row.get("Rating") == PENDING or submission_id in self.rated:
+                continue
+            self.rated.add(submission_id)
+            submission = self.submissions.get(submission_id)
+            if submission is not None:
+                for class_code in self.classes_of.get(submission["Student"], ()):
+                    self.pending_counts[class_code] -= 1
+
+    def _reload(self):
+        versions = {table: self.repo.version(table) for table in REVIEW_TABLES}
+        if versions == self.versions:
+            return
+        self._reset()
+        # Scores first, so submissions that are already rated never enter the pending counts
+        self._add_scores(self.repo.find("scores", columns=["Submission ID", "Rating"]).to_dict("records"))
+        self._add_students(self.repo.find("students", columns=["Student Name", "Class Code"]).to_dict("records"))
+        self._add_submissions(self.repo.find("submissions").to_dict("records"))
+        self.versions = versions
+
+    def record_write(self, table, rows, version_before, version_after):
+        """Folds rows this process just wrote to students, submissions or scores into the queues."""
+        with self.lock:
+            if self.versions and self.versions.get(table) == version_before:
+                {"students": self._add_students, "submissions": self._add_submissions, "scores": self._add_scores}[table](rows)
+                self.versions[table] = version_after
+
+    # --------------------------
+    # NAVIGATION
+    # --------------------------
+    def _order(self, class_code, order):
+        keys = self.orders.get((class_code, order))
+        if keys is None:
+            keys = sorted(self._sort_key(submission_id, order) for submission_id in self.by_class.get(class_code, []))
+            self.orders[(class_code, order)] = keys
+            self.heads[(class_code, order)] = 0
+        return keys
+
+    def _first(self, class_code, order):
+        # Everything before the head is reviewed, so the head only ever moves forward past new ratings
+        keys = self._order(class_code, order)
+        head = self.heads[(class_code, order)]
+        while head < len(keys) and keys[head][-1] in self.rated:
+            head += 1
+        self.heads[(class_code, order)] = head
+        return keys[head][-1] if head < len(keys) else None
+
+    def pending_count(self, class_code):
+        """Number of the class's submissions still waiting for a rating."""
+        with self.lock:
+            self._refresh()
+            return self.pending_counts.get(class_code, 0)
+
+    def is_pending(self, class_code, submission_id):
+        """True if submission_id is in class_code's queue and not yet rated."""
+        with self.lock:
+            self._refresh()
+            submission = self.submissions.get(submission_id)
+            return (
+                submission is not None
+                and submission_id not in self.rated
+                and class_code in self.classes_of.get(submission["Student"], ())
+            )
+
+    def first(self, class_code, order="time"):
+        """The first unrated submission ID of the class in the given order, or None."""
+        with self.lock:
+            self._refresh()
+            return self._first(class_code, order)
+
+    def neighbour(self, class_code, submission_id, step, order="time"):
+        """
+        The unrated submission step places (1 for next, -1 for previous) from submission_id in the
+        class's queue, or None at either end. Starts from the front if submission_id is not queued.
+        """
+        with self.lock:
+            self._refresh()
+            if submission_id not in self.submissions:
+                return self._first(class_code, order)
+            keys = self._order(class_code, order)
+            head = self.heads[(class_code, order)]
+            i = bisect_left(keys, self._sort_key(submission_id, order)) + step
+            while head <= i < len(keys):
+                if keys[i][-1] not in self.rated:
+                    return keys[i][-1]
+                i += step
+            return None
+
+    def submission(self, submission_id):
+        """The stored submission row for submission_id, as a dict."""
+        with self.lock:
+            self._refresh()
+            return dict(self.submissions[submission_id])
@@ -0,0 +1,166 @@
+import csv
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows has no fcntl; fall back to in-process locking only
+    fcntl = None
+
+# --------------------------
+# FILE LOCKING
+# --------------------------
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held = threading.local()
+
+
+def _thread_lock(file_path):
+    """Returns the in-process lock guarding file_path."""
+    key = os.path.abspath(file_path)
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(key, threading.RLock())
+
+
+@contextmanager
+def locked(file_path):
+    """
+    Holds an exclusive lock on file_path (across threads and processes).
+    Re-entrant: a thread already holding the lock can take it again.
+    """
+    key = os.path.abspath(file_path)
+    with _thread_lock(file_path):
+        depth = getattr(_held, "depth", {})
+        _held.depth = depth
+        if depth.get(key):
+            depth[key] += 1
+            try:
+                yield
+            finally:
+                depth[key] -= 1
+            return
+
+        with open(file_path + ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            depth[key] = 1
+            try:
+                yield
+            finally:
+                depth[key] = 0
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# --------------------------
+# READS & WRITES
+# --------------------------
+def read_header(file_path):
+    """Returns the column names from the first line of a CSV, or [] if empty."""
+    with open(file_path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def atomic_write(file_path, df):
+    """Writes df to file_path via a temp file so readers never see a half-written CSV."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            df.to_csv(f, index=False)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def ensure_columns(file_path, columns):
+    """Adds any of columns missing from the CSV's header, rewriting the file once if needed."""
+    with locked(file_path):
+        header = read_header(file_path)
+        missing = [col for col in columns if col not in header]
+        if missing:
+            df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+            for col in missing:
+                df[col] = pd.NA
+            atomic_write(file_path, df)
+
+
+def _ends_with_newline(file_path):
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def append_rows(file_path, rows):
+    """
+    Appends rows (a list of dicts) to a CSV without rewriting it.
+    Only when a row brings a column the header lacks is the file rewritten once with the wider header.
+    """
+    if not rows:
+        return
+    with locked(file_path):
+        header = read_header(file_path)
+        new_columns = [col for row in rows for col in row if col not in header]
+        if new_columns:
+            df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+            df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
+            atomic_write(file_path, df)
+            return
+
+        needs_newline = not _ends_with_newline(file_path)
+        with open(file_path, "a", newline="", encoding="utf-8") as f:
+            if needs_newline:
+                f.write("\n")
+            writer = csv.writer(f)
+            writer.writerows([[row.get(col, "") for col in header] for row in rows])
+
+
+def append_row(file_path, row):
+    """Appends a single record (dict of column -> value) to a CSV."""
+    append_rows(file_path, [row])
+
+# --------------------------
+# COMPACTION
+# --------------------------
+def compact(file_path, keys=None):
+    """
+    Rewrites a CSV atomically. With keys, only the latest row per key is kept
+    (e.g. the current status of each session); without keys, rows are kept as-is.
+    """
+    with locked(file_path):
+        # Read as text so codes like "012345" or "1e5000" are written back unchanged
+        df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+        if keys:
+            df = df.drop_duplicates(subset=keys, keep="last")
+        atomic_write(file_path, df)
+
+
+def start_compactor(tables, interval=60):
+    """
+    Starts a daemon thread that compacts each table (file path -> key columns or None)
+    whenever its file has grown since the last pass.
+    """
+    def run():
+        last_sizes = {}
+        while True:
+            time.sleep(interval)
+            for file_path, keys in tables.items():
+                try:
+                    size = os.path.getsize(file_path)
+                    if keys and size != last_sizes.get(file_path):
+                        compact(file_path, keys)
+                        last_sizes[file_path] = os.path.getsize(file_path)
+                except (OSError, ValueError):
+                    continue
+
+    thread = threading.Thread(target=run, name="csv-compactor", daemon=True)
+    thread.start()
+    return thread
@@ -1,64 +1,176 @@
 import streamlit as st
 import pandas as pd
+import io
 import os
+import threading
+import time
 import uuid
 from datetime import datetime
 
-# --------------------------
-# FILE PATHS
-# --------------------------
-CLASSES_CSV = "classes.csv"
-STUDENT_CSV = "students.csv"
-TASKS_ASSIGNED_CSV = "tasks_assigned.csv"
-TASKS_LIST_CSV = "tasks_list.csv"
-SCORES_CSV = "scores.csv"
-SUBMISSIONS_CSV = "submissions.csv"
-SESSIONS_CSV = "sessions.csv"
+import analytics
+import assignments
+import blobs
+import bootstrap
+import changes
+import indexes
+import jobs
+import leaderboard
+import profiling
+import reports
+import repository
+import review
+from profiling import PROFILER
+
+PROFILER.begin_rerun()
 
 # --------------------------
-# INITIALIZE CSV FILES
+# STORAGE BACKEND
 # --------------------------
-def initialize_csv(file_path, columns):
-    """Creates an empty CSV with the given columns if it does not exist."""
-    if not os.path.exists(file_path):
-        df = pd.DataFrame(columns=columns)
-        df.to_csv(file_path, index=False)
-
-# Ensuring all required CSVs exist
-initialize_csv(CLASSES_CSV, ["Class Code", "Class Name", "CSE"])
-initialize_csv(STUDENT_CSV, ["Student Name", "Class Code"])
-initialize_csv(TASKS_ASSIGNED_CSV, ["Student", "Task Name", "Day", "Time Block", "CSE"])
-initialize_csv(SCORES_CSV, ["Student", "XP", "Rating", "Umeme"])
-initialize_csv(SUBMISSIONS_CSV, ["Student", "Task Name", "File Type", "File Name", "Submission Time", "Start Time", "Day", "Time Block"])
-initialize_csv(SESSIONS_CSV, ["Class Code", "Session Status"])
-
-# Predefined list of tasks for assignment
-if not os.path.exists(TASKS_LIST_CSV):
-    tasks_data = [
-        ["Day 1", "LM Soma Time", "Spot the Logic", "Play a game of *Spot It!* to identify logic-based sequences.", "Building blocks, puzzles, problem-solving worksheets"],
-        ["Day 1", "KIN Siri Time", "Express Through Movement", "Mimic emotions through movement in response to music or images.", "Music, scarves, props"],
-        ["Day 1", "KIN Solver Time", "Tangled Team Escape", "Work as a team to untangle a *Human Knot*.", "Ropes, small objects for team tasks"],
-        ["Day 1", "LM Soma Time", "Data Detective", "Analyze a dataset to determine patterns and trends.", "Graph paper, calculators, data analysis charts"],
-        ["Day 2", "LM Soma Time", "Predict the Pattern", "Guess the next item in a logic sequence.", "Pattern blocks, prediction exercises"],
-        ["Day 2", "KIN Siri Time", "Acrobat's Flow", "Perform a sequence of controlled acrobatic movements focusing on balance and strength.", "Exercise mats, safety pads"],
-        ["Day 2", "KIN Solver Time", "Speed & Agility Race", "Complete a series of physical coordination challenges such as ladder drills and obstacle navigation.", "Jump ropes, reaction speed tools"],
-        ["Day 2", "LM Soma Time", "Color Code Challenge", "Sort and arrange items based on a color and pattern logic rule.", "Color sorting games, sequencing cards"],
-        ["Day 2", "LM Siri Time", "Chart the Data", "Analyze bar charts to identify key statistical insights and predict trends.", "Bar charts, statistical datasets"],
-        ["Day 2", "LM Solver Time", "Solve the Mystery", "Analyze a case study to uncover logical inconsistencies and solve a problem.", "Case study problems, debate prompts"],
-        ["Day 3", "LM Solver Time", "Master of Strategy", "Play a board game like chess and explain strategic moves.", "Board games, scenario-based challenges"],
-        ["Day 3", "LM Soma Time", "Number Puzzle Challenge", "Solve mathematical puzzles using operations like addition, subtraction, multiplication, and division.", "Math manipulatives, counters"],
-        ["Day 3", "KIN Siri Time", "Steady Hands", "Complete a dexterity test by threading beads or sculpting fine details in clay.", "Fine motor skill activities (clay, threading beads)"],
-        ["Day 3", "LM Solver Time", "Master of Strategy", "Play a board game like chess and explain strategic moves.", "Board games, scenario-based challenges"],
-        ["Day 3", "LM Soma Time", "Mind's Eye", "Interpret abstract optical illusions and explain their logical or artistic significance.", "Optical illusions, abstract art exploration"],
-        ["Day 3", "KIN Siri Time", "Fast Reflex Test", "Perform a reaction-time challenge using stopwatches and movement drills.", "Stopwatches, fast-paced movement drills"],
-        ["Day 3", "Solver Time", "Virtual Problem-Solver", "Engage in a VR-based real-world simulation and solve a presented challenge.", "VR headset or interactive AR experience for simulations"],
-        ["Day 4", "Soma & Siri Time", "Professional Interview", "Prepare and conduct an interview at the field trip location.", "Notebook, field trip guide"],
-        ["Day 4", "Soma & Siri Time", "Field Trip to Observe Real-World Practitioners", "Visit Apollo space center, and gymnastics/Acrobatics Training Center"],
-        ["Day 4", "Solver Time", "Hands-on Industry Engagement", "Interview professionals using Kinesthetic and Logical-Mathematical Intelligence"],
-        ["Day 4", "Siri Time", "Reflection & Discussion", "Journaling and group discussion on field trip learnings"],
-    ]
-    df_tasks = pd.DataFrame(tasks_data, columns=["Day", "Element", "Task Name", "Description", "Resources"])
-    df_tasks.to_csv(TASKS_LIST_CSV, index=False)
+@st.cache_resource
+def get_repository():
+    """
+    Opens the storage backend (Parquet, CSV, SQLite or MongoDB) once per server process,
+    brings it up to date with bootstrap's migrations and times every call.
+    """
+    repo = repository.open_repository()
+    bootstrap.run(repo)
+    repo.start_background_tasks()
+    return profiling.InstrumentedRepository(repo, PROFILER)
+
+@st.cache_resource
+def get_indexes():
+    """In-memory lookup indexes shared by every session in this server process."""
+    return indexes.IndexSet(get_repository(), feed=get_change_feed())
+
+@st.cache_resource
+def get_blob_store():
+    """Content-addressed store for uploaded submission files (UWAZI_BLOB_DIR, default 'uploads')."""
+    return blobs.BlobStore(os.environ.get("UWAZI_BLOB_DIR", "uploads"))
+
+@st.cache_resource
+def get_score_rollups():
+    """Per-student XP/Umeme totals shared by every session in this server process."""
+    return leaderboard.ScoreRollups(get_repository(), get_change_feed())
+
+@st.cache_resource
+def get_class_analytics():
+    """Completion, timing and XP/Umeme reports shared by every session in this server process."""
+    return analytics.ClassAnalytics(get_repository(), get_change_feed())
+
+@st.cache_resource
+def get_change_feed():
+    """Watches every table's version for the whole server process, so reruns don't probe storage."""
+    feed = changes.ChangeFeed(get_repository(), repository.TABLES)
+    feed.start()
+    return feed
+
+@st.cache_resource
+def get_job_queue():
+    """Worker pool for submission feedback and post-processing, resuming jobs left by a restart."""
+    def on_write(table, rows, version_before, version_after):
+        get_indexes().record_write(table, rows, version_before, version_after)
+        get_change_feed().publish(table)
+
+    queue = jobs.JobQueue(get_repository(), get_blob_store().root, on_write=on_write)
+    queue.resume()
+    return queue
+
+@st.cache_resource
+def get_review_queue():
+    """Per-class queues of unrated submissions shared by every session in this server process."""
+    return review.ReviewQueue(get_repository(), get_change_feed())
+
+repo = get_repository()
+table_indexes = get_indexes()
+blob_store = get_blob_store()
+score_rollups = get_score_rollups()
+class_analytics = get_class_analytics()
+change_feed = get_change_feed()
+job_queue = get_job_queue()
+review_queue = get_review_queue()
+
+@st.cache_resource
+def get_read_cache():
+    """
+    The latest read of each (table, where) shared by every session: key -> (version, DataFrame).
+    Handing out the same frame avoids unpickling a copy per rerun, and keeping one version per key
+    means a table's older versions are dropped as soon as it is read again.
+    """
+    return {}, threading.Lock()
+
+read_cache, read_cache_lock = get_read_cache()
+
+def load(table, where=None):
+    """
+    Reads rows from table, reusing the result across reruns and sessions until the change feed
+    sees the table's version change. Writes through save() are published to the feed at once.
+    Lookups covered by indexes.INDEXED_LOOKUPS are answered from an in-memory index instead.
+    The frame may be shared with other sessions: filter or copy it, never modify it in place.
+    """
+    if where:
+        index = table_indexes.get(table, where)
+        if index is not None:
+            return index.lookup(where)
+    key = (table, tuple(sorted((where or {}).items())))
+    version = change_feed.version(table)
+    with read_cache_lock:
+        cached = read_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    df = repo.find(table, where)
+    with read_cache_lock:
+        read_cache[key] = (version, df)
+    return df
+
+def save(table, rows):
+    """
+    Appends rows (a dict or a list of dicts) to table and patches its indexes and rollups in place.
+    Rows whose repository.UNIQUE_KEYS key is already stored are skipped; returns the rows written.
+    """
+    rows = rows if isinstance(rows, list) else [rows]
+    if table in repository.UNIQUE_KEYS:
+        rows, version_before, version_after = repo.insert_new(table, rows)
+    else:
+        version_before, version_after = repo.insert_many(table, rows)
+    table_indexes.record_write(table, rows, version_before, version_after)
+    if table == "scores":
+        score_rollups.record_write(rows, version_before, version_after)
+    if table in review.REVIEW_TABLES:
+        review_queue.record_write(table, rows, version_before, version_after)
+    change_feed.publish(table)
+    return rows
+
+def changed_since_last_look(key, tables):
+    """True if any of tables changed since this session last asked under key."""
+    cursor = change_feed.cursor(tables)
+    changed = st.session_state.get(key, cursor) != cursor
+    st.session_state[key] = cursor
+    return changed
+
+def show_analytics(group_by, class_code=None):
+    """Completion, time-to-submit and XP/Umeme distribution tables for one grouping."""
+    summary = class_analytics.summary(group_by, class_code)
+    if summary.empty:
+        st.info("ℹ️ No assignments or submissions to analyse yet.")
+        return
+    st.dataframe(summary, hide_index=True)
+    if len(group_by) == 1:
+        st.bar_chart(summary.set_index(group_by[0])["Completion Rate"])
+    col_xp, col_umeme = st.columns(2)
+    col_xp.markdown("**XP per completed task**")
+    col_xp.dataframe(class_analytics.distribution("XP", group_by, class_code), hide_index=True)
+    col_umeme.markdown("**Umeme per completed task**")
+    col_umeme.dataframe(class_analytics.distribution("Umeme", group_by, class_code), hide_index=True)
+
+def show_paginated(df, key, page_size=50):
+    """Shows one page of df with a page picker, so only page_size rows reach the browser."""
+    pages = max((len(df) - 1) // page_size + 1, 1)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    with PROFILER.timed("render:dataframe") as volume:
+        page_rows = df.iloc[start:start + page_size]
+        volume["rows"] = len(page_rows)
+        st.dataframe(page_rows)
 
 # --------------------------
 # HELPER FUNCTIONS
@@ -67,20 +179,29 @@ def generate_code():
     """Generates a short unique code."""
     return str(uuid.uuid4())[:6]
     
+def start_task_timers(pairs):
+    """
+    Starts the Umeme clock for each (student, task) pair that has none yet.
+    The first start is the one kept, however many tabs, reruns or workers try again.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return save("timings", [{"Student": student, "Task Name": task, "Start Time": now} for student, task in pairs])
+
+def task_start_time(student, task):
+    """When the student's clock for task started, starting it now if the task is being opened for the first time."""
+    timing = load("timings", {"Student": student, "Task Name": task})
+    if timing.empty:
+        start_task_timers([(student, task)])
+        timing = load("timings", {"Student": student, "Task Name": task})
+    return pd.Timestamp(timing["Start Time"].iloc[0]).to_pydatetime()
+
 def check_session_status(class_code):
     """Check if a class has an active session."""
-    df_sessions = pd.read_csv(SESSIONS_CSV)
-    session = df_sessions[df_sessions["Class Code"] == class_code]
-    return not session.empty and session["Session Status"].iloc[0] == "Active"
+    session = load("sessions", {"Class Code": class_code})
+    return not session.empty and session["Session Status"].iloc[-1] == "Active"
     
 def calculate_xp(uwazi_rating):
-    return {
-        "🪨 Struggles - Needs significant support": 5,
-        "🌿 Beginning - Identifies some elements with help but no solution": 10,
-        "🍁 Progressing - Understands key steps but needs guidance for final answer": 15,
-        "🌳 Independent - Solves the problem with logical reasoning": 25,
-        "🌻 Mastery - Solves quickly, explains reasoning, and applies learning": 30
-    }.get(uwazi_rating, 0)
+    return bootstrap.UWAZI_RUBRIC.get(uwazi_rating, 0)
 
 def calculate_umeme(start_time, end_time):
     """
@@ -94,16 +215,98 @@ def calculate_umeme(start_time, end_time):
     else:
         return 5
 
-def ai_feedback(text):
-    """Simple AI-generated feedback for text submissions."""
-    if not text:
-        return "No response provided."
-    elif len(text) < 50:
-        return "Try expanding your response with more details."
-    elif "because" in text or "reason" in text:
-        return "Great job explaining your reasoning!"
+def submission_jobs(submission_id):
+    """Latest status row of each background job for a submission, keyed by job kind."""
+    rows = jobs.latest_jobs(load("jobs", {"Submission ID": submission_id}))
+    return {row["Kind"]: row for row in rows.to_dict("records")}
+
+def feedback_of(submission):
+    """A submission's feedback: stored with it, or produced later by its feedback job."""
+    if isinstance(submission.get("Feedback"), str) and submission["Feedback"]:
+        return submission["Feedback"]
+    job = submission_jobs(review.submission_id_of(submission)).get("feedback")
+    if job is None:
+        return "CSE will review."
+    if job["Status"] == jobs.DONE:
+        return job["Result"]
+    if job["Status"] == jobs.FAILED:
+        return "Feedback could not be generated."
+    return "⏳ Feedback is being prepared..."
+
+def show_submission_file(submission):
+    """Shows a submitted file to the reviewing CSE, reading it from the blob store only when asked."""
+    file_ref = submission.get("File Ref")
+    if not isinstance(file_ref, str) or not blob_store.exists(file_ref):
+        st.info("ℹ️ No stored file for this submission.")
+        return
+
+    file_type = str(submission.get("File Type"))
+    file_name = str(submission.get("File Name"))
+    thumbnail = submission_jobs(review.submission_id_of(submission)).get("thumbnail")
+    if thumbnail is not None and thumbnail["Status"] == jobs.DONE and blob_store.exists(thumbnail["Result"]):
+        st.image(blob_store.path(thumbnail["Result"]), caption="Preview")
+    is_media = file_type.split("/")[0] in ("video", "audio", "image")
+    if file_type == "text":
+        st.text(blob_store.read(file_ref).decode("utf-8", errors="replace"))
+    elif is_media and blob_store.size(file_ref) > blobs.PREVIEW_MAX_BYTES:
+        st.caption("ℹ️ This file is too large to preview here. Download it to view it.")
+    elif is_media and st.toggle("👀 Preview File"):
+        file_path = blob_store.path(file_ref)
+        if file_type.startswith("video/"):
+            st.video(file_path, format=file_type)
+        elif file_type.startswith("audio/"):
+            st.audio(file_path, format=file_type)
+        else:
+            st.image(file_path)
+
+    st.download_button(
+        "📥 Download Submission",
+        data=lambda: blob_store.read(file_ref),
+        file_name=file_name,
+        mime=file_type if "/" in file_type else None,
+        on_click="ignore",
+    )
+
+# --------------------------
+# LIVE PANELS
+# --------------------------
+# Seconds between refreshes of the panels below. Each refresh reruns only its own fragment and
+# reads through load(), so nothing is re-read from storage unless the change feed saw a write.
+LIVE_REFRESH = 3
+
+@st.fragment(run_every=LIVE_REFRESH)
+def live_student_tasks(student_name, class_code, shown_tasks):
+    """Session status and assigned tasks, rerunning the whole page when a new task arrives."""
+    session_active = check_session_status(class_code)
+    student_tasks = load("assignments", {"Student": student_name})
+    if changed_since_last_look("student_tasks_feed", ["sessions", "assignments"]) and len(student_tasks) != shown_tasks:
+        st.rerun()
+
+    if session_active:
+        if not student_tasks.empty:
+            st.markdown("### 📌 My Assigned Tasks")
+            st.dataframe(student_tasks)
+        else:
+            st.warning("No tasks have been assigned yet.")
     else:
-        return "Good effort! Consider adding examples or deeper insights."
+        st.warning("🚫 Session has not started for this class. Wait for the CSE to start the session.")
+
+@st.fragment(run_every=LIVE_REFRESH)
+def live_feedback(student_name):
+    """Feedback on the student's submissions, filled in as background jobs finish."""
+    my_submissions = load("submissions", {"Student": student_name})
+    if not my_submissions.empty:
+        st.markdown("### 📝 My Feedback")
+        for submission in my_submissions.to_dict("records"):
+            st.markdown(f"**{submission['Task Name']}** ({submission['Submission Time']}): {feedback_of(submission)}")
+
+@st.fragment(run_every=LIVE_REFRESH)
+def live_review_count(class_code, queue_empty):
+    """How many submissions wait for review, rerunning the whole page when work arrives in an empty queue."""
+    waiting = review_queue.pending_count(class_code)
+    if changed_since_last_look("review_feed", review.REVIEW_TABLES) and queue_empty and waiting:
+        st.rerun()
+    st.metric("Waiting for Review", waiting)
 
 # --------------------------
 # STREAMLIT CONFIG & HEADER
@@ -121,6 +324,7 @@ menu_option = st.sidebar.radio("Navigation", [
     "🎓 Student Dashboard",
     "🔐 Admin Dashboard"
 ])
+section_start = time.perf_counter()
 
 # --------------------------
 # 🏫 CLASS MANAGEMENT (CSEs create classes)
@@ -132,13 +336,10 @@ if menu_option == "🏫 Class Management":
     class_name = st.text_input("Enter Class Name")
 
     # Load classes data
-    try:
-        df_classes = pd.read_csv(CLASSES_CSV)
-    except FileNotFoundError:
-        df_classes = pd.DataFrame(columns=["Class Code", "Class Name", "CSE"])
+    df_classes = load("classes")
 
     # Check if class already exists
-    existing_classes = df_classes[df_classes["Class Name"].str.lower() == class_name.lower()] if not df_classes.empty else pd.DataFrame()
+    existing_classes = df_classes[df_classes["Class Name"].map(repository.class_key) == repository.class_key(class_name)] if not df_classes.empty else pd.DataFrame()
 
     if st.button("Create Class"):
         if not cse_name or not class_name:
@@ -147,10 +348,12 @@ if menu_option == "🏫 Class Management":
             st.warning(f"⚠️ Class '{class_name}' already exists! Try a different name.")
         else:
             class_code = generate_code()
-            new_class = pd.DataFrame({"Class Code": [class_code], "Class Name": [class_name], "CSE": [cse_name]})
-            df_classes = pd.concat([df_classes, new_class], ignore_index=True)
-            df_classes.to_csv(CLASSES_CSV, index=False)
-            st.success(f"✅ Class '{class_name}' created! Class Code: {class_code}")
+            new_class = {"Class Code": class_code, "Class Name": class_name, "CSE": cse_name}
+            if save("classes", new_class):
+                df_classes = pd.concat([df_classes, pd.DataFrame([new_class])], ignore_index=True)
+                st.success(f"✅ Class '{class_name}' created! Class Code: {class_code}")
+            else:
+                st.warning(f"⚠️ Class '{class_name}' already exists! Try a different name.")
 
     # Display existing classes managed by the CSE
     if not df_classes.empty:
@@ -168,7 +371,7 @@ elif menu_option == "📊 CSE Dashboard":
     st.markdown("### 📊 CSE Dashboard - Assign Tasks")
 
     # Load CSE's classes
-    df_classes = pd.read_csv(CLASSES_CSV)
+    df_classes = load("classes")
     if df_classes.empty:
         st.warning("No classes created yet. Create one in 'Class Management'.")
     else:
@@ -181,23 +384,20 @@ elif menu_option == "📊 CSE Dashboard":
             st.success("✅ Session is ACTIVE for this class.")
         else:
             if st.button("Start Session"):
-                df_sessions = pd.read_csv(SESSIONS_CSV)
-                new_session = pd.DataFrame({"Class Code": [selected_class], "Session Status": ["Active"]})
-                df_sessions = pd.concat([df_sessions, new_session], ignore_index=True)
-                df_sessions.to_csv(SESSIONS_CSV, index=False)
+                # Task clocks start when each student first opens a task (task_start_time), not here:
+                # a class is started once, and its later days' tasks would already be hours old
+                save("sessions", {"Class Code": selected_class, "Session Status": "Active"})
                 st.success(f"✅ Session started for class {selected_class}")
 
         # Assign Tasks
-        student_df = pd.read_csv(STUDENT_CSV)
-        students_in_class = student_df[student_df["Class Code"] == selected_class]["Student Name"].tolist()
+        students_in_class = load("students", {"Class Code": selected_class})["Student Name"].tolist()
 
         if students_in_class:
             selected_student = st.selectbox("Select Student", students_in_class)
 
             # Select Day & Task
             day_choice = st.selectbox("Select Day", ["Day 1", "Day 2", "Day 3", "Day 4"])
-            task_df = pd.read_csv(TASKS_LIST_CSV)
-            task_options = task_df[task_df["Day"] == day_choice]
+            task_options = load("tasks", {"Day": day_choice})
 
             # Display available tasks
             st.dataframe(task_options)
@@ -205,60 +405,108 @@ elif menu_option == "📊 CSE Dashboard":
 
             # Assign Task
             if st.button("Assign Task"):
-                assigned_tasks = pd.read_csv(TASKS_ASSIGNED_CSV)
-                new_task = pd.DataFrame({
-                    "Student": [selected_student],
-                    "Task Name": [selected_task],
-                    "Day": [day_choice],
-                    "Time Block": [task_options[task_options["Task Name"] == selected_task]["Element"].values[0]],
-                    "CSE": ["CSE Name Placeholder"]
+                assigned = save("assignments", {
+                    "Student": selected_student,
+                    "Task Name": selected_task,
+                    "Day": day_choice,
+                    "Time Block": task_options[task_options["Task Name"] == selected_task]["Element"].values[0],
+                    "CSE": "CSE Name Placeholder"
                 })
-                assigned_tasks = pd.concat([assigned_tasks, new_task], ignore_index=True)
-                assigned_tasks.to_csv(TASKS_ASSIGNED_CSV, index=False)
-                st.success(f"✅ Assigned '{selected_task}' to {selected_student}!")
-
-            # View submissions
+                if assigned:
+                    st.success(f"✅ Assigned '{selected_task}' to {selected_student}!")
+                else:
+                    st.info(f"ℹ️ {selected_student} already has '{selected_task}' on {day_choice}.")
+
+            # Bulk Assign
+            with st.expander("📦 Bulk Assign to Whole Class"):
+                bulk_scope = st.radio("Assign", ["Selected task", "All tasks for the selected day", "Full unit schedule"])
+                distribution = "all"
+                if bulk_scope != "Selected task":
+                    distribution = st.selectbox(
+                        "Distribution", list(assignments.DISTRIBUTIONS),
+                        format_func=assignments.DISTRIBUTIONS.get
+                    )
+
+                if st.button("Assign to Whole Class"):
+                    if bulk_scope == "Selected task":
+                        bulk_tasks = task_options[task_options["Task Name"] == selected_task]
+                    elif bulk_scope == "All tasks for the selected day":
+                        bulk_tasks = task_options
+                    else:
+                        bulk_tasks = load("tasks")
+
+                    class_cse = df_classes.loc[df_classes["Class Code"] == selected_class, "CSE"].iloc[0]
+                    new_assignments = assignments.plan_assignments(
+                        students_in_class, bulk_tasks, load("assignments"), class_cse, distribution
+                    )
+                    if new_assignments.empty:
+                        st.info("ℹ️ Every student already has these tasks.")
+                    else:
+                        assigned = save("assignments", new_assignments.to_dict("records"))
+                        assigned_students = len({row["Student"] for row in assigned})
+                        st.success(f"✅ Assigned {len(assigned)} tasks across {assigned_students} students!")
+
+            # Class Leaderboard
+            with st.expander("🏆 Class Leaderboard"):
+                class_totals = score_rollups.class_totals(students_in_class)
+                col_xp, col_umeme, col_pending = st.columns(3)
+                col_xp.metric("Class XP", class_totals["Total XP"])
+                col_umeme.metric("Class Umeme ⚡", class_totals["Total Umeme"])
+                col_pending.metric("Pending Review", class_totals["Pending Review"])
+                st.dataframe(score_rollups.leaderboard(students_in_class))
+                if class_totals["Ratings"]:
+                    st.bar_chart(pd.Series(class_totals["Ratings"], name="Ratings"))
+
+            # Class Analytics
+            with st.expander("📈 Class Analytics"):
+                class_group = st.radio("Group By", analytics.DIMENSIONS[1:], horizontal=True, key="class_analytics_group")
+                show_analytics([class_group], selected_class)
+
+            # Review queue: the class's unrated submissions, one at a time
             st.markdown("### 📌 Review Student Work")
-            df_submissions = pd.read_csv(SUBMISSIONS_CSV)
-
-            if not df_submissions.empty:
-                st.dataframe(df_submissions)
-                submission_students = df_submissions["Student"].unique().tolist()
-                selected_student_review = st.selectbox("Select Student to Assess", submission_students)
-                
-                student_submissions = df_submissions[df_submissions["Student"] == selected_student_review]
-                selected_task_review = st.selectbox("Select Task to Review", student_submissions["Task Name"].unique().tolist())
-
-                task_details = student_submissions[student_submissions["Task Name"] == selected_task_review].iloc[0]
+            review_order = st.radio("Review Order", list(review.ORDERS), format_func=review.ORDERS.get, horizontal=True)
+            cursor_key = f"review_cursor_{selected_class}"
+            cursor = st.session_state.get(cursor_key)
+            if cursor is None or not review_queue.is_pending(selected_class, cursor):
+                cursor = review_queue.first(selected_class, review_order)
+
+            col_prev, col_waiting, col_next = st.columns(3)
+            if col_prev.button("⬅️ Previous") and cursor is not None:
+                cursor = review_queue.neighbour(selected_class, cursor, -1, review_order) or cursor
+            if col_next.button("Next ➡️") and cursor is not None:
+                cursor = review_queue.neighbour(selected_class, cursor, 1, review_order) or cursor
+            with col_waiting:
+                live_review_count(selected_class, cursor is None)
+            st.session_state[cursor_key] = cursor
+
+            if cursor is None:
+                st.info("🎉 All submissions for this class have been reviewed.")
+            else:
+                task_details = review_queue.submission(cursor)
+                st.markdown(f"👤 **Student:** {task_details['Student']}  \n📌 **Task:** {task_details['Task Name']} ({task_details['Day']}, {task_details['Time Block']})")
                 st.markdown(f"📂 **File Submitted:** {task_details['File Name']}  \n📅 **Submission Time:** {task_details['Submission Time']}")
-
-                # Assign a rating
-                rating = st.selectbox("Rate the Submission", ["Excellent", "Great", "Good", "Needs Improvement"])
-                xp_awarded = calculate_xp(rating)
+                st.markdown(f"📝 **AI Feedback:** {feedback_of(task_details)}")
+                show_submission_file(task_details)
 
                 # Uwazi Rubric-Based Rating with detailed descriptions
-                uwazi_rubric = {
-                    "🪨 Struggles - Needs significant support": 5,
-                    "🌿 Beginning - Identifies some elements with help but no solution": 10,
-                    "🍁 Progressing - Understands key steps but needs guidance for final answer": 15,
-                    "🌳 Independent - Solves the problem with logical reasoning": 25,
-                    "🌻 Mastery - Solves quickly, explains reasoning, and applies learning": 30
-                }
-
-                selected_rating = st.selectbox("Rate the Submission", list(uwazi_rubric.keys()))
+                selected_rating = st.selectbox("Rate the Submission", list(bootstrap.UWAZI_RUBRIC.keys()))
                 xp_awarded = calculate_xp(selected_rating)
 
                 if st.button("Save Rating"):
-                    df_scores = pd.read_csv(SCORES_CSV)
-                    new_entry = pd.DataFrame({
-                        "Student": [selected_student_review],
-                        "XP": [xp_awarded],
-                        "Rating": [selected_rating],
-                        "Umeme": [0]
+                    rated = save("scores", {
+                        "Student": task_details["Student"],
+                        "XP": xp_awarded,
+                        "Rating": selected_rating,
+                        "Umeme": 0,
+                        "Score ID": f"{cursor}-rating",
+                        "Submission ID": cursor
                     })
-                    df_scores = pd.concat([df_scores, new_entry], ignore_index=True)
-                    df_scores.to_csv(SCORES_CSV, index=False)
-                    st.success(f"✅ Rating Saved! {selected_student_review} earned {xp_awarded} XP!")
+                    # Move on to the next submission in the queue for the next rerun
+                    st.session_state[cursor_key] = review_queue.neighbour(selected_class, cursor, 1, review_order)
+                    if rated:
+                        st.success(f"✅ Rating Saved! {task_details['Student']} earned {xp_awarded} XP!")
+                    else:
+                        st.info("ℹ️ This submission has already been rated.")
 
 # --------------------------
 # 🎓 STUDENT DASHBOARD: JOIN CLASS, VIEW TASKS, SUBMIT WORK
@@ -270,29 +518,23 @@ elif menu_option == "🎓 Student Dashboard":
     class_code = st.text_input("Enter Class Code")
 
     if st.button("Join Class"):
-        df_students = pd.read_csv(STUDENT_CSV)
-        new_entry = pd.DataFrame({"Student Name": [student_name], "Class Code": [class_code]})
-        df_students = pd.concat([df_students, new_entry], ignore_index=True)
-        df_students.to_csv(STUDENT_CSV, index=False)
-        st.success(f"✅ {student_name} joined class {class_code}!")
+        if save("students", {"Student Name": student_name, "Class Code": class_code}):
+            st.success(f"✅ {student_name} joined class {class_code}!")
+        else:
+            st.info(f"ℹ️ {student_name} is already in class {class_code}.")
+
+    if student_name:
+        my_totals = score_rollups.student(student_name)
+        col_xp, col_umeme, col_pending = st.columns(3)
+        col_xp.metric("My XP", my_totals["Total XP"])
+        col_umeme.metric("My Umeme ⚡", my_totals["Total Umeme"])
+        col_pending.metric("Awaiting Review", my_totals["Pending Review"])
 
     # --------------------------
     # VIEW & SUBMIT ASSIGNED TASKS
     # --------------------------
-    if check_session_status(class_code):
-        assigned_df = pd.read_csv(TASKS_ASSIGNED_CSV)
-        student_tasks = assigned_df[assigned_df["Student"] == student_name]
-
-        if not student_tasks.empty:
-            st.markdown("### 📌 My Assigned Tasks")
-            st.dataframe(student_tasks)
-        else:
-            st.warning("No tasks have been assigned yet.")
-    else:
-        st.warning("🚫 Session has not started for this class. Wait for the CSE to start the session.")
-
-    assigned_df = pd.read_csv(TASKS_ASSIGNED_CSV)
-    student_tasks = assigned_df[assigned_df["Student"] == student_name]
+    student_tasks = load("assignments", {"Student": student_name})
+    live_student_tasks(student_name, class_code, len(student_tasks))
 
     if not student_tasks.empty:
         st.markdown("### 📌 My Assigned Tasks")
@@ -311,7 +553,7 @@ elif menu_option == "🎓 Student Dashboard":
         submission_data = None
         file_name = None
         file_type = None
-        start_time = datetime.now()  # Start timing the task
+        start_time = task_start_time(student_name, selected_task)  # Started when the task was first opened
 
         if submission_type == "Text":
             submission_data = st.text_area("Enter your response:")
@@ -321,7 +563,7 @@ elif menu_option == "🎓 Student Dashboard":
         elif submission_type == "Upload File":
             uploaded_file = st.file_uploader("Upload Your Work", type=["png", "jpg", "pdf", "mp4", "mov", "txt", "docx"])
             if uploaded_file:
-                submission_data = uploaded_file.getvalue()
+                submission_data = uploaded_file
                 file_name = uploaded_file.name
                 file_type = uploaded_file.type
 
@@ -336,38 +578,63 @@ elif menu_option == "🎓 Student Dashboard":
             end_time = datetime.now()  # End timing the task
             umeme_points = calculate_umeme(start_time, end_time)
 
-                  # AI-Generated Feedback for Text Submissions
-            feedback = ai_feedback(submission_data) if submission_type == "Text" else "CSE will review."
+            # Store the work itself, streamed to disk in chunks and deduplicated by content
+            file_ref = ""
+            with PROFILER.timed("upload:store") as volume:
+                if submission_type == "Text" and submission_data:
+                    text_bytes = submission_data.encode("utf-8")
+                    file_ref = blob_store.put(io.BytesIO(text_bytes))
+                    volume["bytes"] = len(text_bytes)
+                elif submission_type == "Upload File" and submission_data is not None:
+                    file_ref = blob_store.put(submission_data)
+                    volume["bytes"] = submission_data.size
 
             submission_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            new_submission = pd.DataFrame({
-                "Student": [student_name],
-                "Task Name": [selected_task],
-                "File Type": [file_type if file_type else "N/A"],
-                "File Name": [file_name if file_name else "N/A"],
-                "Submission Time": [submission_time],
-                "Start Time": [start_time.strftime("%Y-%m-%d %H:%M:%S")],
-                "Day": [student_tasks[student_tasks["Task Name"] == selected_task]["Day"].values[0]],
-                "Time Block": [student_tasks[student_tasks["Task Name"] == selected_task]["Time Block"].values[0]],
-                "Feedback": [feedback]
+            submission_id = review.make_submission_id(student_name, selected_task, file_ref or file_name)
+            submitted = save("submissions", {
+                "Student": student_name,
+                "Task Name": selected_task,
+                "File Type": file_type if file_type else "N/A",
+                "File Name": file_name if file_name else "N/A",
+                "Submission Time": submission_time,
+                "Start Time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "Day": student_tasks[student_tasks["Task Name"] == selected_task]["Day"].values[0],
+                "Time Block": student_tasks[student_tasks["Task Name"] == selected_task]["Time Block"].values[0],
+                "Feedback": "" if submission_type == "Text" else "CSE will review.",
+                "File Ref": file_ref,
+                "Submission ID": submission_id
             })
 
-            submission_df = pd.concat([pd.read_csv(SUBMISSIONS_CSV), new_submission], ignore_index=True)
-            submission_df.to_csv(SUBMISSIONS_CSV, index=False)
+            if submitted:
+                # Save Umeme Points
+                save("scores", {
+                    "Student": student_name,
+                    "XP": 0,  # XP to be assigned by CSE
+                    "Rating": "Pending",
+                    "Umeme": umeme_points,
+                    "Score ID": f"{submission_id}-umeme",
+                    "Submission ID": submission_id
+                })
 
-            # Save Umeme Points
-            df_scores = pd.read_csv(SCORES_CSV)
-            new_score = pd.DataFrame({
-                "Student": [student_name],
-                "XP": [0],  # XP to be assigned by CSE
-                "Rating": ["Pending"],
-                "Umeme": [umeme_points]
-            })
-            df_scores = pd.concat([df_scores, new_score], ignore_index=True)
-            df_scores.to_csv(SCORES_CSV, index=False)
+                # Feedback and previews are produced by the job queue; this rerun doesn't wait for them.
+                # The points are already saved, so a queue failure must not fail the submission.
+                try:
+                    for kind in jobs.jobs_for(file_type):
+                        job_queue.submit(kind, submission_id, {"File Ref": file_ref, "File Type": file_type})
+                except Exception:
+                    st.warning("⚠️ Feedback could not be queued right now. It will be retried when the app restarts.")
+
+                st.success(f"✅ Task submitted successfully! You earned {umeme_points} Umeme Points! ⚡")
+                if submission_type == "Text":
+                    st.info("📝 Your AI feedback is being prepared and will appear under My Feedback.")
+            else:
+                st.info("ℹ️ You already submitted this work for this task.")
 
-            st.success(f"✅ Task submitted successfully! You earned {umeme_points} Umeme Points! ⚡")
-            st.markdown(f"📝 **AI Feedback:** {feedback}")
+    # --------------------------
+    # FEEDBACK ON PAST SUBMISSIONS
+    # --------------------------
+    if student_name:
+        live_feedback(student_name)
 
 # --------------------------
 # 🔐 ADMIN DASHBOARD (View & Manage Data)
@@ -377,84 +644,95 @@ if menu_option == "🔐 Admin Dashboard":
     
     if admin_password == "siriadmin123":
         st.success("✅ Access Granted to Admin Dashboard")
-        
-        # Display class information
-        st.markdown("#### 📚 All Classes")
-        if os.path.exists(CLASSES_CSV):
-            df_classes = pd.read_csv(CLASSES_CSV)
-            if not df_classes.empty:
-                st.dataframe(df_classes)
-            else:
-                st.warning("No class data available.")
-        else:
-            st.error("🚨 Class data file not found!")
-        
-        # Display student data
-        st.markdown("#### 🎓 Registered Students")
-        if os.path.exists(STUDENT_CSV):
-            df_students = pd.read_csv(STUDENT_CSV)
-            if not df_students.empty:
-                st.dataframe(df_students)
-            else:
-                st.warning("No student data available.")
-        else:
-            st.error("🚨 Student data file not found!")
-        
-        # Display task data
-        st.markdown("#### 📌 Assigned Tasks")
-        if os.path.exists(TASKS_LIST_CSV):
-            df_tasks = pd.read_csv(TASKS_LIST_CSV)
-            if not df_tasks.empty:
-                st.dataframe(df_tasks)
-            else:
-                st.warning("No task data available.")
-        else:
-            st.error("🚨 Task data file not found!")
-        
-        # Display scores
-        st.markdown("#### 🏆 Student Scores & XP")
-        if os.path.exists(SCORES_CSV):
-            df_scores = pd.read_csv(SCORES_CSV)
-            if not df_scores.empty:
-                st.dataframe(df_scores)
-            else:
-                st.warning("No scores recorded yet.")
-        else:
-            st.error("🚨 Scores file not found!")
-        
-        # Display submissions with student names
-        st.markdown("#### 📸 Student Submissions")
-        if os.path.exists(SUBMISSIONS_CSV):
-            df_submissions = pd.read_csv(SUBMISSIONS_CSV)
-            if not df_submissions.empty:
-                # Ensure column names exist
-                expected_columns = ["Student", "Task", "File Type", "File Name", "Submission Time"]
-                available_columns = df_submissions.columns.tolist()
-                
-                missing_columns = [col for col in expected_columns if col not in available_columns]
-                
-                if not missing_columns:
-                    st.dataframe(df_submissions[expected_columns])
-                else:
-                    st.error(f"🚨 Missing columns in submissions file: {missing_columns}")
-            else:
-                st.warning("No submissions recorded yet.")
-        else:
-            st.error("🚨 Submissions data file not found!")
 
-        # Option to download all data
+        # Filters shared by every table below
+        st.markdown("#### 🔎 Filters")
+        df_classes = load("classes")
+        col_class, col_student, col_day, col_dates = st.columns(4)
+        filter_class = col_class.selectbox("Class", ["All"] + df_classes["Class Code"].tolist())
+        roster = None
+        if filter_class != "All":
+            roster = load("students", {"Class Code": filter_class})["Student Name"].tolist()
+        student_options = roster if roster is not None else load("students")["Student Name"].dropna().unique().tolist()
+        filter_student = col_student.selectbox("Student", ["All"] + student_options)
+        filter_day = col_day.selectbox("Day", ["All", "Day 1", "Day 2", "Day 3", "Day 4"])
+        filter_dates = col_dates.date_input("Submission Dates", value=())
+
+        filters = {
+            "class_code": None if filter_class == "All" else filter_class,
+            "students": [filter_student] if filter_student != "All" else roster,
+            "day": None if filter_day == "All" else filter_day,
+            "date_range": filter_dates if len(filter_dates) == 2 else None,
+        }
+
+        admin_tables = [
+            ("#### 📚 All Classes", "classes", "No class data available."),
+            ("#### 🎓 Registered Students", "students", "No student data available."),
+            ("#### 📌 Task List", "tasks", "No task data available."),
+            ("#### 🗂️ Assigned Tasks", "assignments", "No tasks have been assigned yet."),
+            ("#### 🏆 Student Scores & XP", "scores", "No scores recorded yet."),
+            ("#### 📸 Student Submissions", "submissions", "No submissions recorded yet."),
+        ]
+        filtered = {}
+        for title, table, empty_message in admin_tables:
+            st.markdown(title)
+            df = reports.filter_rows(load(table), **filters)
+            filtered[table] = df
+            if df.empty:
+                st.warning(empty_message)
+                continue
+            if table == "scores":
+                st.markdown("##### Leaderboard")
+                st.dataframe(score_rollups.leaderboard(filters["students"], limit=20))
+                st.markdown("##### Score Ledger")
+            st.caption(f"{len(df)} rows")
+            show_paginated(df, table)
+
+        # Downloads are only built when a button is clicked
         st.markdown("### 📥 Download Reports")
-        
-        if os.path.exists(CLASSES_CSV):
-            st.download_button("Download Class Data", df_classes.to_csv(index=False), "classes.csv", "text/csv")
-        if os.path.exists(STUDENT_CSV):
-            st.download_button("Download Student Data", df_students.to_csv(index=False), "students.csv", "text/csv")
-        if os.path.exists(TASKS_LIST_CSV):
-            st.download_button("Download Task Data", df_tasks.to_csv(index=False), "tasks.csv", "text/csv")
-        if os.path.exists(SCORES_CSV):
-            st.download_button("Download Score Data", df_scores.to_csv(index=False), "scores.csv", "text/csv")
-        if os.path.exists(SUBMISSIONS_CSV):
-            st.download_button("Download Submissions Data", df_submissions.to_csv(index=False), "submissions.csv", "text/csv")
+        for _, table, _ in admin_tables:
+            st.download_button(
+                f"Download {table.title()} Data",
+                data=lambda df=filtered[table]: df.to_csv(index=False),
+                file_name=f"{table}.csv",
+                mime="text/csv",
+                on_click="ignore",
+            )
+        st.download_button(
+            "Download All (zip)",
+            data=lambda: reports.zip_tables({f"{table}.csv": df for table, df in filtered.items()}),
+            file_name="uwazi_reports.zip",
+            mime="application/zip",
+            on_click="ignore",
+        )
+
+        # Completion, timing and points across classes, days, time blocks and intelligences
+        with st.expander("📈 Cohort Analytics"):
+            cohort_group = st.multiselect("Group By", analytics.DIMENSIONS, default=["Class Code"], key="cohort_analytics_group")
+            if cohort_group:
+                show_analytics(cohort_group, filters["class_code"])
+
+        # Where rerun time goes, for this server process
+        with st.expander("⏱️ Performance Profile"):
+            profile = pd.DataFrame(PROFILER.summary())
+            if profile.empty:
+                st.info("ℹ️ No timings recorded yet.")
+            else:
+                st.dataframe(profile)
+                histogram_operation = st.selectbox("Latency Histogram", profile["Operation"].tolist())
+                st.bar_chart(pd.Series(PROFILER.histogram(histogram_operation), name="Calls"))
+                st.markdown("##### Recent Reruns")
+                recent = pd.DataFrame(PROFILER.recent_reruns())
+                if not recent.empty:
+                    recent["started"] = pd.to_datetime(recent["started"], unit="s")
+                    st.dataframe(recent[["started", "section", "latency_ms", "rows_read", "bytes_written"]].iloc[::-1])
+                st.download_button("Export Reruns (JSONL)", data=PROFILER.to_jsonl, file_name="uwazi_reruns.jsonl",
+                                   mime="application/x-ndjson", on_click="ignore")
+                st.download_button("Export Metrics (Prometheus)", data=PROFILER.to_prometheus, file_name="uwazi_metrics.prom",
+                                   mime="text/plain", on_click="ignore")
     
     else:
         st.error("❌ Incorrect Password. Access Denied.")
+
+PROFILER.record(f"section:{menu_option}", (time.perf_counter() - section_start) * 1000)
+PROFILER.end_rerun(menu_option)
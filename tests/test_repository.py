@@ -0,0 +1,187 @@
+import threading
+from unittest import mock
+
+import mongomock
+import pandas as pd
+import pytest
+
+import repository
+import storage
+
+BACKENDS = ["csv", "parquet", "sqlite", "mongodb"]
+
+
+def open_backend(backend, path, client=None):
+    if backend == "csv":
+        return repository.CsvRepository(str(path))
+    if backend == "parquet":
+        return repository.ParquetRepository(str(path))
+    if backend == "sqlite":
+        return repository.SqliteRepository(str(path / "uwazi.db"))
+    return repository.MongoRepository(client=client)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    """(name, opener) where opener() opens another repository on the same storage."""
+    client = mongomock.MongoClient()
+    return request.param, lambda: open_backend(request.param, tmp_path, client)
+
+
+@pytest.fixture
+def repo(backend):
+    return backend[1]()
+
+
+def submission(student, task, sid, minutes=0):
+    return {
+        "Student": student, "Task Name": task, "File Type": "text", "File Name": "",
+        "Submission Time": f"2026-03-02 09:{minutes:02d}:00", "Start Time": "2026-03-02 09:00:00",
+        "Day": "Day 1", "Time Block": "LM Soma Time", "Feedback": "", "File Ref": "", "Submission ID": sid,
+    }
+
+
+def test_find_where_and_columns(repo):
+    repo.insert_many("students", [
+        {"Student Name": "Amina", "Class Code": "012e45"},
+        {"Student Name": "Baraka", "Class Code": "ABC123"},
+        {"Student Name": "Chiku", "Class Code": "012e45"},
+    ])
+
+    df = repo.find("students", {"Class Code": "012e45"})
+    assert df["Student Name"].tolist() == ["Amina", "Chiku"]
+    assert df["Class Code"].tolist() == ["012e45", "012e45"]
+
+    names = repo.find("students", {"Class Code": "ABC123"}, columns=["Student Name"])
+    assert names.columns.tolist() == ["Student Name"]
+    assert names["Student Name"].tolist() == ["Baraka"]
+
+    assert repo.find("students", {"Class Code": "missing"}).empty
+    assert repo.find("students").columns.tolist() == repository.TABLES["students"]
+
+
+def test_schema_types(repo):
+    repo.insert_many("submissions", [submission("Amina", "Spot the Logic", "s1", minutes=5)])
+    repo.insert_many("scores", [{"Student": "Amina", "XP": 10, "Rating": "Good", "Umeme": "15", "Score ID": "x1", "Submission ID": "s1"}])
+
+    scores = repo.find("scores")
+    assert str(scores["XP"].dtype) == "Int64"
+    assert scores["Umeme"].tolist() == [15]
+
+    submissions = repo.find("submissions")
+    assert pd.api.types.is_datetime64_any_dtype(submissions["Submission Time"])
+    minutes = (submissions["Submission Time"] - submissions["Start Time"]).dt.total_seconds() / 60
+    assert minutes.tolist() == [5]
+
+
+def test_version_changes_on_write(repo):
+    before = repo.version("students")
+    reported_before, after = repo.insert_many("students", [{"Student Name": "Amina", "Class Code": "C1"}])
+    assert reported_before == before
+    assert after == repo.version("students") != before
+    assert repo.version("sessions") == repo.version("sessions")
+
+
+def test_insert_new_suppresses_duplicates(repo):
+    row = {"Student Name": "Amina", "Class Code": "C1"}
+    rows, before, after = repo.insert_new("students", [row, dict(row)])
+    assert rows == [row]
+    assert before != after
+
+    rows, before, after = repo.insert_new("students", [dict(row), {"Student Name": "Amina", "Class Code": "C2"}])
+    assert [r["Class Code"] for r in rows] == ["C2"]
+
+    rows, before, after = repo.insert_new("students", [dict(row)])
+    assert rows == []
+    assert before == after == repo.version("students")
+    assert repo.find("students")["Class Code"].tolist() == ["C1", "C2"]
+
+
+def test_insert_new_keeps_rows_with_blank_keys(repo):
+    blank = {"Student": "", "XP": 0, "Rating": "Pending", "Umeme": 0, "Score ID": "", "Submission ID": ""}
+    rows, _, _ = repo.insert_new("scores", [blank, dict(blank)])
+    assert len(rows) == 2
+    assert len(repo.find("scores")) == 2
+
+
+def test_class_names_are_unique_ignoring_case(repo):
+    rows, _, _ = repo.insert_new("classes", [{"Class Code": "A1", "Class Name": "Math", "CSE": "Ms A"}])
+    assert rows[0]["Class Key"] == "math"
+    rows, _, _ = repo.insert_new("classes", [{"Class Code": "B2", "Class Name": "  MATH ", "CSE": "Mr B"}])
+    assert rows == []
+    assert repo.find("classes")["Class Code"].tolist() == ["A1"]
+
+
+def test_insert_new_across_instances(backend):
+    _, opener = backend
+    first, second = opener(), opener()
+    row = {"Student": "Amina", "Task Name": "Spot the Logic", "Start Time": "2026-03-02 09:00:00"}
+
+    assert len(first.insert_new("timings", [row])[0]) == 1
+    assert second.insert_new("timings", [dict(row)])[0] == []
+    assert len(first.find("timings")) == 1
+
+
+@pytest.mark.parametrize("backend_name", ["csv", "parquet", "sqlite"])
+def test_concurrent_insert_new_writes_each_key_once(backend_name, tmp_path):
+    repos = [open_backend(backend_name, tmp_path) for _ in range(4)]
+    rows = [{"Submission ID": f"s{i}", "Student": "Amina", "Task Name": f"Task {i}"} for i in range(20)]
+    inserted = []
+
+    def worker(repo):
+        for row in rows:
+            inserted.extend(repo.insert_new("submissions", [submission(row["Student"], row["Task Name"], row["Submission ID"])])[0])
+
+    threads = [threading.Thread(target=worker, args=(repo,)) for repo in repos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(inserted) == 20
+    assert sorted(repos[0].find("submissions")["Submission ID"]) == sorted(row["Submission ID"] for row in rows)
+
+
+@pytest.mark.parametrize("backend_name", ["csv", "parquet"])
+def test_insert_new_retries_after_failed_write(backend_name, tmp_path):
+    repo = open_backend(backend_name, tmp_path)
+    repo.insert_new("timings", [{"Student": "Baraka", "Task Name": "T", "Start Time": "2026-03-02 09:00:00"}])
+    row = {"Student": "Amina", "Task Name": "T", "Start Time": "2026-03-02 09:00:00"}
+
+    with mock.patch.object(storage, "append_rows", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            repo.insert_new("timings", [row])
+
+    assert len(repo.insert_new("timings", [row])[0]) == 1
+    assert repo.find("timings", {"Student": "Amina"})["Task Name"].tolist() == ["T"]
+
+
+def test_parquet_compaction_keeps_rows_and_types(tmp_path):
+    repo = repository.ParquetRepository(str(tmp_path))
+    repo.insert_many("sessions", [
+        {"Class Code": "012345", "Session Status": "Active"},
+        {"Class Code": "012345", "Session Status": "Inactive"},
+    ])
+    repo.insert_many("scores", [{"Student": "Amina", "XP": 5, "Rating": "Good", "Umeme": 15, "Score ID": "x1", "Submission ID": "s1"}])
+
+    repo.compact("sessions")
+    repo.compact("scores")
+
+    assert repo.find("sessions", {"Class Code": "012345"})["Session Status"].tolist() == ["Inactive"]
+    assert repo.find("scores")["XP"].tolist() == [5]
+    assert repo.insert_new("scores", [{"Score ID": "x1"}])[0] == []
+
+
+def test_mongo_removes_duplicate_keys_before_indexing():
+    client = mongomock.MongoClient()
+    client.uwazi.students.insert_many([
+        {"Student Name": "Amina", "Class Code": "C1"},
+        {"Student Name": "Amina", "Class Code": "C1"},
+        {"Student Name": "Baraka", "Class Code": "C1"},
+    ])
+
+    repo = repository.MongoRepository(client=client)
+
+    assert repo.find("students")["Student Name"].tolist() == ["Amina", "Baraka"]
+    assert any(index.get("unique") for index in client.uwazi.students.index_information().values())
+    assert repo.insert_new("students", [{"Student Name": "Amina", "Class Code": "C1"}])[0] == []
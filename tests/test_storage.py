@@ -0,0 +1,29 @@
+import pandas as pd
+
+import storage
+from repository import CsvRepository
+
+
+def test_compact_keeps_numeric_looking_codes(tmp_path):
+    repo = CsvRepository(str(tmp_path))
+    repo.insert_many("sessions", [
+        {"Class Code": "012345", "Session Status": "Active"},
+        {"Class Code": "1e5000", "Session Status": "Active"},
+    ])
+
+    storage.compact(repo.files["sessions"], ["Class Code"])
+
+    assert repo.find("sessions", {"Class Code": "012345"})["Session Status"].tolist() == ["Active"]
+    assert repo.find("sessions", {"Class Code": "1e5000"})["Session Status"].tolist() == ["Active"]
+
+
+def test_new_column_rewrite_keeps_text(tmp_path):
+    file_path = str(tmp_path / "sessions.csv")
+    storage.atomic_write(file_path, pd.DataFrame(columns=["Class Code", "Session Status"]))
+    storage.append_row(file_path, {"Class Code": "012345", "Session Status": "Active"})
+
+    storage.append_row(file_path, {"Class Code": "00789", "Session Status": "Active", "CSE": "Amina"})
+
+    df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+    assert df["Class Code"].tolist() == ["012345", "00789"]
+    assert df["CSE"].tolist() == ["", "Amina"]